@@ -1,15 +1,28 @@
-import statistics
-import random
-import difflib  #for fuzzy matching
-import matplotlib.pyplot as plt
+import argparse
+import csv
+import json
 import sys # for quit_program function
 from storage import T4W4movie_storage_sql as storage
-import requests
+from storage import omdb_cache
 import os
-import re
+import time
+
+import instrumentation
+import omdb_client
+import poster_cache
+import website_generator
 
 OMDB_API_KEY = "3ec8c4da"
 
+# Number of movie cards per page of the generated website
+WEBSITE_PAGE_SIZE = 1000
+
+# Maximum number of movies shown by the search
+SEARCH_RESULT_LIMIT = 50
+
+# Number of movies per page of the "List movies" command
+LIST_PAGE_SIZE = 20
+
 
 # ANSI escape sequence for red color
 RED = "\033[91m"
@@ -17,44 +30,37 @@ RESET = "\033[0m"
 
 
 def fetch_movie_from_omdb(title):
-    """Fetch movie data from OMDb API by title."""
-    try:
-        response = requests.get(
-            "http://www.omdbapi.com/",
-            params={"t": title, "apikey": OMDB_API_KEY}
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        if data["Response"] == "False":
-            print(f"{RED}Movie not found: {data.get('Error')}{RESET}")
-            return None
+    """Fetch movie data from OMDb API by title.
+    Answers (including "not found") are cached, so repeated titles don't hit the API."""
+    cached_movie = omdb_cache.cache.lookup(title)
+    if cached_movie is None:
+        print(f"{RED}Movie not found (cached answer).{RESET}")
+        return None
+    if cached_movie is not omdb_cache.MISS:
+        return cached_movie
 
-        # Extract year
-        year_str = data.get("Year", "")
-        match = re.match(r"(\d{4})", year_str)
-        year_num = int(match.group(1)) if match else 0
+    import requests  # imported here, it is only needed when fetching
 
-        # Extract and convert rating
-        rating_str = data.get("imdbRating", "0.0")
-        try:
-            rating = float(rating_str)
-        except ValueError:
-            rating = 0.0
+    try:
+        start_time = time.perf_counter()
+        data = omdb_client.request_movie(title, OMDB_API_KEY)
+        movie = omdb_client.parse_movie(data)
+        omdb_cache.cache.store(title, movie, time.perf_counter() - start_time)
 
-        # Return dictionary
-        return {
-            "title": data.get("Title", "Unknown"),
-            "year": year_num,
-            "rating": rating,
-            "poster_url": data.get("Poster", "")
-        }
+        if movie is None:
+            print(f"{RED}Movie not found: {data.get('Error')}{RESET}")
+        return movie
 
     except requests.exceptions.RequestException as e:
         print(f"{RED}Error fetching movie data: {e}{RESET}")
         return None
 
 
+def format_movie(movie):
+    """One line of the movie lists: 'Title (year): rating'."""
+    return f"{movie.title} ({movie.year}): {movie.rating}"
+
+
 def quit_program():
     """User can quit the program"""
     print("Bye!")
@@ -62,41 +68,78 @@ def quit_program():
 
 
 def command_list_movies():
-    """List all movies in the database with release year and rating."""
-    movies = storage.list_movies()  # This now refers to the imported SQL version
-    print(f"{len(movies)} movies in total")
+    """List all movies in the database with release year and rating, LIST_PAGE_SIZE movies at a time.
+    The user can go to the next or previous page, jump to a page or quit."""
+    movie_count = storage.count_movies()
+    print(f"{movie_count} movies in total")
+    page_count = max(1, -(-movie_count // LIST_PAGE_SIZE))  # rounded up
 
-    for movie in movies:
-        title = movie["title"]
-        year = movie["year"]
-        rating = movie["rating"]
-        print(f"{title} ({year}): {rating}")
+    page_number = 1
+    page = storage.list_movies_page(LIST_PAGE_SIZE)
 
-    pause()
+    while True:
+        for movie in page.movies:
+            print(format_movie(movie))
+        print(f"-- Page {page_number} of {page_count} --")
+
+        choice = ask("[N]ext, [P]revious, [J]ump to page or [Q]uit: ").strip().lower()
+
+        if choice == 'n':
+            next_page = storage.list_movies_page(LIST_PAGE_SIZE, after_id=page.last_id)
+            if next_page.movies:
+                page, page_number = next_page, page_number + 1
+            else:
+                print("This is the last page.")
+        elif choice == 'p':
+            if page_number > 1:
+                page = storage.list_movies_page(LIST_PAGE_SIZE, before_id=page.first_id)
+                page_number -= 1
+            else:
+                print("This is the first page.")
+        elif choice == 'j':
+            try:
+                wanted_page = int(ask(f"Enter a page number (1-{page_count}): "))
+            except ValueError:
+                print(f"{RED}Error: The page number must be a whole number.{RESET}")
+                continue
+            if not 1 <= wanted_page <= page_count:
+                print(f"{RED}Error: There is no page {wanted_page}.{RESET}")
+                continue
+            page_number = wanted_page
+            page = storage.list_movies_page(LIST_PAGE_SIZE, offset=(page_number - 1) * LIST_PAGE_SIZE)
+        elif choice == 'q':
+            break
+        else:
+            print('Please enter "N", "P", "J" or "Q".')  # Custom error message
 
 
 def command_add_movie():
-    """Add a new movie by fetching its info from OMDb API using only the title."""
-    title_input = input("Enter the movie title to add: ").strip()
+    """Add new movies by fetching their info from OMDb API using only the title.
+    Several titles can be entered at once, separated by ';'. They are fetched concurrently."""
+    title_input = ask("Enter the movie title to add (separate several titles with ';'): ").strip()
+    titles = [title.strip() for title in title_input.split(";") if title.strip()]
 
-    if not title_input:
+    if not titles:
         print(f"{RED}Error: Movie title cannot be empty.{RESET}")
         pause()
         return
 
-    movie_data = fetch_movie_from_omdb(title_input)
-
-    if not movie_data:
-        print(f"{RED}Failed to add movie. Check title or try again later.{RESET}")
+    if len(titles) == 1:
+        results = {titles[0]: fetch_movie_from_omdb(titles[0])}
     else:
-        # Use the add_movie() from T4W4movie_storage_sql.py
-        storage.add_movie(
-            movie_data["title"],
-            movie_data["year"],
-            movie_data["rating"],
-            movie_data["poster_url"]
-        )
-        print(f"Movie '{movie_data['title']}' added successfully.")
+        results = omdb_client.fetch_movies(titles, OMDB_API_KEY, cache=omdb_cache.cache)
+
+    for title, movie_data in results.items():
+        if not movie_data:
+            print(f"{RED}Failed to add movie '{title}'. Check title or try again later.{RESET}")
+        else:
+            # Use the add_movie() from T4W4movie_storage_sql.py
+            storage.add_movie(
+                movie_data["title"],
+                movie_data["year"],
+                movie_data["rating"],
+                movie_data["poster_url"]
+            )
 
     pause()
 
@@ -104,31 +147,28 @@ def command_add_movie():
 def delete_movie():
     """User enters the name of the movie to be deleted and the movie is deleted from the database
     If the user enters an invalid movie name, an error message is displayed."""
-    movies = storage.list_movies()
-    titles = [movie['title'] for movie in movies]
+    user_input_deletion = ask("Please enter the name of the movie that you want to delete: ")
 
-    if user_input_deletion not in titles:
+    if storage.get_movie(user_input_deletion) is None:
         print(f"{RED}Error: The movie is not in the database.{RESET}")
     else:
         print(f"{user_input_deletion} is being deleted.")
         storage.delete_movie(user_input_deletion)
 
+    pause()
+
 def update_movie():
     """User enters the name of the movie to be updated and the movie is updated in the database
     If the user enters an invalid movie name, an error message is displayed."""
 
-    movies = storage.list_movies()
-
-    movie_titles = [movie['title'] for movie in movies]
+    user_input_enter_movie = ask("Please enter the name of the movie that you want to update: ")
 
-    user_input_enter_movie = input("Please enter the name of the movie that you want to update: ")
-
-    if user_input_enter_movie not in movie_titles:
+    if storage.get_movie(user_input_enter_movie) is None:
         print(f"{RED}Error: The movie is not in the database.{RESET}")
     else:
         try:
-            user_input_update_rating = float(input("Enter the new rating for the movie: "))
-            user_input_update_year = int(input("Enter the new year of release for the movie: "))
+            user_input_update_rating = float(ask("Enter the new rating for the movie: "))
+            user_input_update_year = int(ask("Enter the new year of release for the movie: "))
 
             storage.update_movie(user_input_enter_movie, user_input_update_rating, user_input_update_year)
         except ValueError:
@@ -139,49 +179,42 @@ def update_movie():
 
 def movie_stats():
     """Calculate and display statistics about the movies in the database"""
-    movies = storage.list_movies()  # Returns a dict
+    stats = storage.get_rating_stats()  # Computed by SQLite, no rows are loaded
 
-    if not movies:
+    if stats is None:
         print(f"{RED}No movies in the database to calculate statistics.{RESET}")
         pause()
         return
 
-    rating_list = [movie["rating"] for movie in movies]
-
-    avg_rating = statistics.mean(rating_list)
-    median_rating = statistics.median(rating_list)
-    max_rating = max(rating_list)
-    min_rating = min(rating_list)
+    print_stats(stats)
 
+    pause()
 
-    best_movies = [movie["title"] for movie in movies if movie["rating"] == max_rating]
-    worst_movies = [movie["title"] for movie in movies if movie["rating"] == min_rating]
 
+def print_stats(stats):
+    """Print the statistics returned by storage.get_rating_stats()."""
     print(f"The average rating of all movies "
-          f"in the database is {avg_rating:.2f}")
-    print(f"The median rating of all movies in the database is {median_rating:.2f}")
+          f"in the database is {stats['average']:.2f}")
+    print(f"The median rating of all movies in the database is {stats['median']:.2f}")
     # Join converts the output into a string, otherwise it would be a list
-    print(f"The best rating is {max_rating:.2f} for movie(s):")
-    print(", ".join(best_movies))
-
-    print(f"The worst rating is {min_rating:.2f} for movie(s):")
-    print(", ".join(worst_movies))
+    print(f"The best rating is {stats['max']:.2f} for movie(s):")
+    print(", ".join(stats["best_titles"]))
 
-    pause()
+    print(f"The worst rating is {stats['min']:.2f} for movie(s):")
+    print(", ".join(stats["worst_titles"]))
 
 
 def random_movie():
     """Picks a random movie from the database and displays its name and rating"""
-    movies = storage.list_movies()
+    chosen_movie = storage.random_movie()  # Only the chosen row is loaded
 
-    if not movies:
+    if chosen_movie is None:
         print(f"{RED}No movies in the database to choose from.{RESET}")
         pause()
         return
 
-    chosen_movie = random.choice(movies)
-    title = chosen_movie["title"]
-    rating = chosen_movie["rating"]
+    title = chosen_movie.title
+    rating = chosen_movie.rating
 
     print(f"The chosen movie is {title} with its rating {rating}")
 
@@ -192,40 +225,26 @@ def search_movie():
     """Search for a movie in the database by title.
     If the exact title is not found, it tries to find a close match."""
 
-    movies = storage.list_movies()
-
-    if not movies:
+    if not storage.count_movies():
         print(f"{RED}No movies in the database to search.{RESET}")
         pause()
         return
 
-    search_string = input("Which movie are you looking for: ").lower()
-    found = False
+    search_string = ask("Which movie are you looking for: ").lower()
 
-    # Create mappings for case-insensitive search
-    original_titles = {movie["title"].lower(): movie["title"] for movie in movies}
-    lowercase_movies = {movie["title"].lower(): movie for movie in movies}
+    # Substring and word matches come from the full-text index, best matches first
+    matches = storage.search_movies(search_string, limit=SEARCH_RESULT_LIMIT)
 
-    for lowercase_title, movie_info in lowercase_movies.items():    # movie_info is the inner dictionary
-        if search_string in lowercase_title:
-            original_title = original_titles[lowercase_title]
-            rating = movie_info["rating"]                           # Accessing the value of "rating" in the inner dict
-            year = movie_info["year"]
-            print(f"{original_title} ({year}), Rating: {rating}")
-            found = True
+    for movie in matches:
+        print(f"{movie.title} ({movie.year}), Rating: {movie.rating}")
 
-    if not found:
-        close_matches = difflib.get_close_matches(
-            search_string, lowercase_movies.keys(), n=5, cutoff=0.5
-        )
+    if not matches:
+        close_matches = storage.suggest_movies(search_string, limit=5, cutoff=0.5)
 
         if close_matches:
             print("No exact match found. Did you mean:")
-            for match in close_matches:
-                original_title = original_titles[match]
-                rating = lowercase_movies[match]["rating"]
-                year = lowercase_movies[match]["year"]
-                print(f"{original_title} ({year}), Rating: {rating}")
+            for movie in close_matches:
+                print(f"{movie.title} ({movie.year}), Rating: {movie.rating}")
         else:
             print(f"{RED}No movies matched your search.{RESET}")
 
@@ -234,19 +253,16 @@ def search_movie():
 
 def sort_movie_rating():
     """Sort movies by rating in descending order"""
-    movies = storage.list_movies()  # Returns a list of dicts
+    # descending=True sorts in decending order (done by SQLite)
+    sorted_movies = storage.find_movies(order_by="rating", descending=True)
 
-    if not movies:
+    if not sorted_movies:
         print(f"{RED}No movies in the database to sort.{RESET}")
         pause()
         return
 
-    # reverse=True sorts in decending order
-    sorted_movies = sorted(
-        movies, key=lambda movie: movie["rating"], reverse=True
-    )
     for movie in sorted_movies:
-        print(f"{movie['title']} ({movie['year']}): {movie['rating']}")
+        print(format_movie(movie))
 
     pause()
 
@@ -254,26 +270,24 @@ def sort_movie_rating():
 def sort_movie_year():
     """Sort movies by year in descending or ascending order, depending on the user's choice.
     It displays an error message if the user enters an invalid choice."""
-    movies = storage.list_movies()  # Returns a list of dicts
-
-    if not movies:
+    if not storage.count_movies():
         print(f"{RED}No movies in the database to sort.{RESET}")
         pause()
         return
 
     while True:
-        choice_order = input("Do you want the latest movies first? (Y/N): ").strip().lower()
+        choice_order = ask("Do you want the latest movies first? (Y/N): ").strip().lower()
 
         if choice_order == 'y':
-            sorted_movies = sorted(movies, key=lambda movie: movie["year"], reverse=True)
+            sorted_movies = storage.find_movies(order_by="year", descending=True)
             for movie in sorted_movies:
-                print(f"{movie['title']} ({movie['year']}): {movie['rating']}")
+                print(format_movie(movie))
             break
 
         elif choice_order == 'n':
-            sorted_movies = sorted(movies, key=lambda movie: movie["year"], reverse=False)
+            sorted_movies = storage.find_movies(order_by="year", descending=False)
             for movie in sorted_movies:
-                print(f"{movie['title']} ({movie['year']}): {movie['rating']}")
+                print(format_movie(movie))
             break
 
         else:
@@ -283,89 +297,142 @@ def sort_movie_year():
 
 
 def filter_movies():
-    """User can filter movies by minimum rating, start year and end year. Not yet implemented."""
-    movies = storage.list_movies()  # Returns a list of dicts
-    print("Functionality will soon be added.")
+    """User can filter movies by minimum rating, start year and end year.
+    Empty input means no limit for that filter."""
+    try:
+        min_rating_input = ask("Enter minimum rating (leave blank for no minimum rating): ").strip()
+        start_year_input = ask("Enter start year (leave blank for no start year): ").strip()
+        end_year_input = ask("Enter end year (leave blank for no end year): ").strip()
+
+        min_rating = float(min_rating_input) if min_rating_input else None
+        start_year = int(start_year_input) if start_year_input else None
+        end_year = int(end_year_input) if end_year_input else None
+    except ValueError:
+        print(f"{RED}Error: The rating must be a number and the years must be whole numbers.{RESET}")
+        pause()
+        return
+
+    filtered_movies = storage.find_movies(
+        min_rating=min_rating,
+        year_range=(start_year, end_year),
+        order_by="year"
+    )
+
+    if not filtered_movies:
+        print(f"{RED}No movies matched your filters.{RESET}")
+    else:
+        print("Filtered Movies:")
+        for movie in filtered_movies:
+            print(format_movie(movie))
 
     pause()
 
 
 def create_rating_histogram():
-    """If the database is not empty, create a histogram of the ratings and saves it to a file."""
-    movies = storage.list_movies()  # Returns a list of dicts
-
-    if not movies:
+    """If the database is not empty, create a chart (rating histogram, movies per year
+    or average rating by decade) and save it to a file.
+    The chart is drawn in the background, so the menu can be used in the meantime."""
+    if not storage.count_movies():
         print(f"{RED}No movies in the database to generate a histogram.{RESET}")
         pause()
         return
 
-    # Extract ratings
-    ratings = [movie["rating"] for movie in movies]
-
-    filename = input("Enter the filename to save the histogram (e.g., ratings.png): ").strip()
+    chart_types = {"1": "ratings", "2": "years", "3": "decades"}
+    choice = ask("Which chart? 1. Rating histogram 2. Movies per year "
+                 "3. Average rating by decade (default 1): ").strip() or "1"
+    if choice not in chart_types:
+        print(f"{RED}Invalid choice. Please enter 1, 2 or 3.{RESET}")
+        pause()
+        return
 
-    # Create histogram
-    plt.figure(figsize=(8, 6))
-    plt.hist(ratings, bins=10, edgecolor='black', color='skyblue')
-    plt.title("Movie Rating Distribution")
-    plt.xlabel("Rating")
-    plt.ylabel("Number of Movies")
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    filename = ask("Enter the filename to save the histogram (e.g., ratings.png): ").strip()
 
-    # Save plot to file
-    plt.savefig(filename)
-    plt.close()
+    import charts  # imported here, only needed for charts
 
-    print(f"Histogram saved as '{filename}'")
+    try:
+        future = charts.request_chart(chart_types[choice], filename)
+    except ImportError as e:
+        # NumPy and matplotlib are only needed for charts, see requirements.txt
+        print(f"{RED}Charts need {e.name or 'a missing package'}, install it with: "
+              f"pip install -r requirements.txt{RESET}")
+        pause()
+        return
+    if future.done():
+        print(f"Histogram saved as '{filename}' (unchanged data, taken from the cache)")
+    else:
+        print(f"Drawing the chart in the background, it will be saved as '{filename}'.")
+        future.add_done_callback(report_chart)
 
     pause()
 
 
-def generate_website():
-    """Generate an HTML website using movie data and template."""
-    movies = storage.list_movies()
-    html_cards = ''
-    for movie in movies:
-        title = movie["title"]
-        year = movie["year"]
-        rating = movie["rating"]
-        poster = movie["poster_url"]
-
-        html_cards += f"""
-        <div class="movie-card">
-            <h2>{title}</h2>
-            <p>Year: {year}</p>
-            <p>Rating: {rating}</p>
-            <img src="{poster}" alt="{title} poster" class="movie-poster">
-        </div>
-        """
+def report_chart(future):
+    """Called when a background chart is finished."""
+    try:
+        print(f"\nHistogram saved as '{future.result()}'")
+    except Exception as e:
+        print(f"\n{RED}Error creating the chart: {e}{RESET}")
 
+
+def generate_website():
+    """Generate an HTML website using movie data and template.
+    Only the pages (WEBSITE_PAGE_SIZE movies each) whose movies changed since the last run are rewritten."""
     try:
-        with open("index_template.html", "r") as f:
-            template = f.read()
+        pages = build_website()
     except FileNotFoundError:
         print("Error: index_template.html not found.")
         return
 
-    final_html = template.replace("__TEMPLATE_MOVIE_GRID__", html_cards)
+    if not pages:
+        print("✅ Website is up to date.")
+    else:
+        print(f"✅ Website generated, {len(pages)} page(s) rewritten.")
 
-    with open("index.html", "w") as f:
-        f.write(final_html)
+    pause()
 
-    print("✅ Website generated as index.html.")
 
-    pause()
+def build_website(page_size=WEBSITE_PAGE_SIZE, full_rebuild=False, download_posters=True):
+    """Write the website pages and return the list of rewritten files.
+    Only changed pages are rewritten unless full_rebuild is True. Posters
+    are downloaded into posters/ first (new ones only) and shown from there."""
+    posters = None
+    if download_posters:
+        posters = poster_cache.cache_posters(storage.iter_poster_urls())
+    if full_rebuild:
+        return website_generator.generate_site(
+            storage.iter_movies(),
+            template_path="index_template.html",
+            page_size=page_size,
+            posters=posters
+        )
+    return website_generator.update_site(
+        storage.iter_movie_revisions(include_poster_url=posters is not None),
+        storage.movies_in_id_range,
+        template_path="index_template.html",
+        page_size=page_size,
+        posters=posters
+    )
+
+
+def ask(prompt):
+    """input() for the menu actions: the time the user takes to answer is
+    left out of the menu_action_seconds timings."""
+    with instrumentation.untimed():
+        return input(prompt)
 
 
 def pause():
     """Pause function (return to main menu with ENTER) that is implemented in all other functions of the menu"""
-    input("Press ENTER to continue: ")
+    ask("Press ENTER to continue: ")
 
 
 def main():
     """Contains the dictionary and the menu options.
     Asks for user input and calls the corresponding function."""
 
+    storage.init_db()
+    instrumentation.instrument_engine(storage.get_engine())
+
     menu_options = {        #for mapping the input of the user with an action
         0: quit_program,
         1: command_list_movies,
@@ -395,10 +462,153 @@ def main():
 
         action = menu_options.get(user_menu_choice)
         if action:
-            action()
+            # Waiting for input inside the action is not counted (see ask())
+            instrumentation.run_command("menu_action_seconds", action.__name__, action)
         else:
             print(f"{RED}Invalid choice. Please try again.{RESET}")
 
 
+def cli_list(args):
+    """movies list: stream the (filtered, sorted) movies to stdout."""
+    movies = storage.iter_find_movies(
+        min_rating=args.min_rating,
+        year_range=(args.start_year, args.end_year),
+        title_contains=args.contains,
+        order_by=args.sort,
+        descending=args.desc,
+        limit=args.limit
+    )
+    if args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["title", "year", "rating", "poster_url"])
+        for movie in movies:
+            writer.writerow(movie)
+    elif args.format == "jsonl":
+        for movie in movies:
+            sys.stdout.write(json.dumps(movie._asdict()) + "\n")
+    else:
+        for movie in movies:
+            sys.stdout.write(format_movie(movie) + "\n")
+    return 0
+
+
+def cli_add(args):
+    """movies add: fetch titles from OMDb (concurrently) and add or update them."""
+    titles = list(args.titles)
+    if args.from_file:
+        with (sys.stdin if args.from_file == "-" else open(args.from_file, "r")) as fileobj:
+            titles.extend(line.strip() for line in fileobj if line.strip())
+    if not titles:
+        print(f"{RED}Error: No titles given.{RESET}", file=sys.stderr)
+        return 1
+
+    results = omdb_client.fetch_movies(titles, OMDB_API_KEY, cache=omdb_cache.cache)
+    found = [movie for movie in results.values() if movie]
+    for title, movie in results.items():
+        if not movie:
+            print(f"{RED}Failed to add movie '{title}'.{RESET}", file=sys.stderr)
+
+    report = storage.bulk_add_movies(found)
+    print(f"{report['inserted']} movies added, {report['duplicates']} updated, "
+          f"{len(titles) - len(found)} not found")
+    return 0 if found else 1
+
+
+def cli_stats(args):
+    """movies stats: print the rating statistics."""
+    stats = storage.get_rating_stats()
+    if args.json:
+        print(json.dumps(stats))
+    elif stats is None:
+        print("No movies in the database.")
+    else:
+        print_stats(stats)
+    return 0
+
+
+def cli_build_site(args):
+    """movies build-site: write the website pages."""
+    try:
+        pages = build_website(page_size=args.page_size, full_rebuild=args.full,
+                              download_posters=not args.no_posters)
+    except FileNotFoundError:
+        print("Error: index_template.html not found.", file=sys.stderr)
+        return 1
+    print(f"{len(pages)} page(s) written.")
+    return 0
+
+
+def build_global_parser():
+    """Options that work with a command and with the interactive menu."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", metavar="FOLDER",
+                        help="write a cProfile file per command or menu action into FOLDER")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write command, OMDb and SQL timings to FILE on exit "
+                             "(Prometheus text for *.prom, JSON otherwise)")
+    return parser
+
+
+def build_arg_parser():
+    """The parser of the non-interactive command line (see run_cli)."""
+    parser = argparse.ArgumentParser(
+        prog="movies",
+        description="Movie database. Without a command the interactive menu starts.",
+        parents=[build_global_parser()]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="print movies to stdout")
+    list_parser.add_argument("--min-rating", type=float)
+    list_parser.add_argument("--start-year", type=int)
+    list_parser.add_argument("--end-year", type=int)
+    list_parser.add_argument("--contains", help="only titles containing this text")
+    list_parser.add_argument("--sort", choices=sorted(storage.SORTABLE_COLUMNS))
+    list_parser.add_argument("--desc", action="store_true", help="sort in descending order")
+    list_parser.add_argument("--limit", type=int)
+    list_parser.add_argument("--format", choices=("text", "jsonl", "csv"), default="text")
+    list_parser.set_defaults(handler=cli_list)
+
+    add_parser = commands.add_parser("add", help="add movies by title (fetched from OMDb)")
+    add_parser.add_argument("titles", nargs="*")
+    add_parser.add_argument("--from-file", help="file with one title per line ('-' for stdin)")
+    add_parser.set_defaults(handler=cli_add)
+
+    stats_parser = commands.add_parser("stats", help="print rating statistics")
+    stats_parser.add_argument("--json", action="store_true")
+    stats_parser.set_defaults(handler=cli_stats)
+
+    site_parser = commands.add_parser("build-site", help="generate the website")
+    site_parser.add_argument("--page-size", type=int, default=WEBSITE_PAGE_SIZE)
+    site_parser.add_argument("--full", action="store_true", help="rewrite every page")
+    site_parser.add_argument("--no-posters", action="store_true",
+                             help="link the remote posters instead of downloading them")
+    site_parser.set_defaults(handler=cli_build_site)
+
+    return parser
+
+
+def run_cli(argv):
+    """Run one non-interactive command, e.g. run_cli(["list", "--sort", "year"])."""
+    args = build_arg_parser().parse_args(argv)
+    storage.init_db()
+    instrumentation.instrument_engine(storage.get_engine())
+    try:
+        return instrumentation.run_command("cli_command_seconds", args.command, args.handler, args)
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; don't print a traceback
+        sys.stderr.close()
+        return 0
+
+
 if __name__ == "__main__":
-    main()
+    options, command_argv = build_global_parser().parse_known_args(sys.argv[1:])
+    if options.profile:
+        instrumentation.enable_profiling(options.profile)
+    try:
+        if command_argv:
+            sys.exit(run_cli(command_argv))
+        main()
+    finally:
+        if options.metrics:
+            instrumentation.registry.write(options.metrics)
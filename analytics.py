@@ -0,0 +1,89 @@
+"""Rating and year analytics on NumPy arrays.
+
+load_arrays() reads the year and rating columns with one SELECT straight
+into preallocated NumPy arrays; the other functions work on those arrays
+without Python loops.
+"""
+import numpy as np
+from sqlalchemy import text
+
+from storage import T4W4movie_storage_sql as storage
+
+ROW_DTYPE = np.dtype([("year", np.int32), ("rating", np.float64)])
+
+
+def load_arrays(min_rating=None, year_range=None, title_contains=None):
+    """Return (years, ratings) arrays of the matching movies, in id order."""
+    conditions, params = storage.build_filters(min_rating, year_range, title_contains)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    with storage.get_engine().connect() as connection:
+        # The count and the rows must come from the same snapshot; pysqlite
+        # doesn't open a transaction for SELECTs, so begin one explicitly
+        connection.exec_driver_sql("BEGIN")
+        if conditions:
+            row_count = connection.execute(text(f"SELECT COUNT(*) FROM movies{where}"), params).scalar()
+        else:
+            row_count = connection.execute(text("SELECT movie_count FROM movie_stats WHERE id = 1")).scalar()
+        result = connection.execute(text(f"SELECT year, rating FROM movies{where} ORDER BY id"), params)
+        # fromiter with count fills one preallocated buffer, no intermediate list
+        rows = np.fromiter(result.cursor, dtype=ROW_DTYPE, count=row_count)
+        connection.rollback()
+
+    return rows["year"], rows["rating"]
+
+
+def rating_percentiles(ratings, percentiles=(10, 25, 50, 75, 90)):
+    """Return {percentile: rating}, or an empty dict if there are no ratings."""
+    if len(ratings) == 0:
+        return {}
+    values = np.percentile(ratings, percentiles)
+    return {percentile: float(value) for percentile, value in zip(percentiles, values)}
+
+
+def decade_averages(years, ratings):
+    """Return {decade: (movie count, average rating)}, e.g. {1990: (12, 7.4)}."""
+    if len(years) == 0:
+        return {}
+    decades = (years // 10) * 10
+    first_decade = decades.min()
+    slots = (decades - first_decade) // 10
+    counts = np.bincount(slots)
+    sums = np.bincount(slots, weights=ratings)
+    return {
+        int(first_decade + slot * 10): (int(counts[slot]), float(sums[slot] / counts[slot]))
+        for slot in np.flatnonzero(counts)
+    }
+
+
+def rating_histogram(ratings, bins=10, value_range=(0, 10)):
+    """Return (counts, bin_edges) of the ratings, see np.histogram."""
+    return np.histogram(ratings, bins=bins, range=value_range)
+
+
+def year_histogram(years, bin_width=5):
+    """Return (counts, bin_edges) of the release years in bins of bin_width years."""
+    if len(years) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    start = (years.min() // bin_width) * bin_width
+    stop = (years.max() // bin_width + 1) * bin_width
+    return np.histogram(years, bins=np.arange(start, stop + 1, bin_width))
+
+
+def rating_year_correlation(years, ratings):
+    """Pearson correlation of rating and year (nan with fewer than two movies
+    or when either column is constant)."""
+    if len(years) < 2 or years.std() == 0 or ratings.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(years, ratings)[0, 1])
+
+
+def summarize(years, ratings):
+    """All of the above in one dict."""
+    return {
+        "count": int(len(ratings)),
+        "mean": float(ratings.mean()) if len(ratings) else None,
+        "percentiles": rating_percentiles(ratings),
+        "decade_averages": decade_averages(years, ratings),
+        "rating_year_correlation": rating_year_correlation(years, ratings)
+    }
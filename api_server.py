@@ -0,0 +1,281 @@
+"""Small HTTP/JSON API for the movie database.
+
+Usage: python api_server.py [--host 127.0.0.1] [--port 8000]
+
+    GET    /movies?limit=50&after_id=0&min_rating=&start_year=&end_year=&contains=
+                                  one page of movies (keyset pagination, see next_after_id)
+    GET    /movies/search?q=...   ranked title search ("suggestions" if nothing matched)
+    GET    /movies/<title>        one movie
+    GET    /stats                 rating statistics
+    GET    /metrics               request and SQL timings (Prometheus text format)
+    POST   /movies                add a movie, body: {"title", "year", "rating", "poster_url"}
+    PUT    /movies/<title>        update a movie, body: {"rating", "year"}
+    DELETE /movies/<title>        delete a movie
+
+GET responses carry an ETag built from the catalog revision counter, so
+clients can revalidate with If-None-Match and get 304 Not Modified until
+something changes. Responses are gzip-compressed when the client accepts
+it. Each request is handled in its own thread.
+"""
+import argparse
+import gzip
+import json
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from sqlalchemy.exc import IntegrityError
+
+import instrumentation
+from storage import T4W4movie_storage_sql as storage
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+GZIP_MIN_SIZE = 1024  # smaller bodies are not worth compressing
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def int_param(query, name, default=None, maximum=None, minimum=None):
+    """Read an integer query parameter. Values above maximum are capped,
+    values below minimum are rejected."""
+    values = query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a whole number.")
+    if minimum is not None and value < minimum:
+        raise ApiError(400, f"'{name}' must be at least {minimum}.")
+    return min(value, maximum) if maximum is not None else value
+
+
+def float_param(query, name):
+    """Read a decimal query parameter."""
+    values = query.get(name)
+    if not values or values[0] == "":
+        return None
+    try:
+        return float(values[0])
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a number.")
+
+
+def route_label(parts):
+    """The route of a request for the metrics. Titles and unknown paths are
+    replaced by placeholders to keep the number of series small."""
+    path = "/" + "/".join(parts)
+    if path in ("/movies", "/movies/search", "/stats"):
+        return path
+    if len(parts) == 2 and parts[0] == "movies":
+        return "/movies/<title>"
+    return "<unknown>"
+
+
+class MovieApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive connections
+    server_version = "MovieApi/1.0"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits for the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    # Routing
+
+    def do_GET(self):
+        self.handle_request(self.get_resource, cacheable=True)
+
+    def do_POST(self):
+        self.handle_request(self.post_resource)
+
+    def do_PUT(self):
+        self.handle_request(self.put_resource)
+
+    def do_DELETE(self):
+        self.handle_request(self.delete_resource)
+
+    def handle_request(self, handler, cacheable=False):
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        query = parse_qs(url.query)
+        if parts == ["metrics"] and self.command == "GET":
+            self.send_text(200, instrumentation.registry.to_prometheus())
+            return
+        with instrumentation.registry.time("http_request_seconds", f"{self.command} {route_label(parts)}"):
+            self.dispatch(handler, parts, query, cacheable)
+
+    def dispatch(self, handler, parts, query, cacheable):
+        try:
+            # Read the revision before the data, so a change in between
+            # makes the ETag older than the body, never newer
+            etag = f'W/"{storage.get_catalog_revision()}"' if cacheable else None
+            # Routing and validation come first: unknown paths and bad
+            # parameters get their error even with a matching If-None-Match
+            status, body = handler(parts, query)
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)})
+            return
+        except Exception:
+            # e.g. "database is locked" or a pool timeout: answer instead
+            # of dropping the connection
+            traceback.print_exc()
+            self.send_json(500, {"error": "Internal server error."})
+            return
+
+        if not cacheable:
+            self.send_json(status, body)
+        elif etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_json(status, body, {"ETag": etag, "Cache-Control": "no-cache"})
+
+    # Resources
+
+    def get_resource(self, parts, query):
+        if parts == ["stats"]:
+            return 200, storage.get_rating_stats() or {"count": 0}
+
+        if parts == ["movies"]:
+            filters = {
+                "min_rating": float_param(query, "min_rating"),
+                "year_range": (int_param(query, "start_year"), int_param(query, "end_year")),
+                "title_contains": (query.get("contains") or [None])[0]
+            }
+            page = storage.list_movies_page(
+                limit=int_param(query, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, minimum=1),
+                after_id=int_param(query, "after_id"),
+                filters=filters
+            )
+            return 200, {
+                "movies": [movie._asdict() for movie in page.movies],
+                "next_after_id": page.last_id
+            }
+
+        if parts == ["movies", "search"]:
+            search_string = (query.get("q") or [""])[0]
+            limit = int_param(query, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, minimum=1)
+            movies = storage.search_movies(search_string, limit=limit)
+            body = {"movies": [movie._asdict() for movie in movies]}
+            if not movies:
+                body["suggestions"] = [movie._asdict() for movie in storage.suggest_movies(search_string)]
+            return 200, body
+
+        if len(parts) == 2 and parts[0] == "movies":
+            movie = storage.get_movie(parts[1])
+            if movie is None:
+                raise ApiError(404, f"No movie found with title '{parts[1]}'.")
+            return 200, movie._asdict()
+
+        raise ApiError(404, "Not found.")
+
+    def post_resource(self, parts, query):
+        if parts != ["movies"]:
+            raise ApiError(404, "Not found.")
+        data = self.read_json()
+        try:
+            with storage.session() as movie_session:
+                movie_session.add(str(data["title"]), int(data["year"]), float(data["rating"]),
+                                  data.get("poster_url"))
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "A movie needs a title, a year and a rating.")
+        except IntegrityError:
+            raise ApiError(409, f"The movie '{data['title']}' already exists.")
+        return 201, storage.get_movie(str(data["title"]))._asdict()
+
+    def put_resource(self, parts, query):
+        if len(parts) != 2 or parts[0] != "movies":
+            raise ApiError(404, "Not found.")
+        data = self.read_json()
+        try:
+            rating, year = float(data["rating"]), int(data["year"])
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "An update needs a rating and a year.")
+        with storage.session() as movie_session:
+            if not movie_session.update(parts[1], rating, year):
+                raise ApiError(404, f"No movie found with title '{parts[1]}'.")
+        return 200, storage.get_movie(parts[1])._asdict()
+
+    def delete_resource(self, parts, query):
+        if len(parts) != 2 or parts[0] != "movies":
+            raise ApiError(404, "Not found.")
+        with storage.session() as movie_session:
+            if not movie_session.delete(parts[1]):
+                raise ApiError(404, f"No movie found with title '{parts[1]}'.")
+        return 204, None
+
+    # Helpers
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            raise ApiError(400, "The request body must be JSON.")
+        if not isinstance(data, dict):
+            raise ApiError(400, "The request body must be a JSON object.")
+        return data
+
+    def send_json(self, status, body, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        if payload:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if len(payload) >= GZIP_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzip.compress(payload, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_text(self, status, text):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would slow down the server under load
+
+
+def make_server(host="127.0.0.1", port=8000):
+    """Create the threaded server (call serve_forever() on it); the
+    database must already be set up with storage.init_db()."""
+    server = ThreadingHTTPServer((host, port), MovieApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the movie database over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    storage.init_db()
+    instrumentation.instrument_engine(storage.get_engine())
+    server = make_server(args.host, args.port)
+    print(f"Serving the movie API on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Bye!")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
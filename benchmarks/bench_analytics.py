@@ -0,0 +1,57 @@
+"""NumPy analytics vs. the list-based path on a large catalog.
+
+Usage: python -m benchmarks.bench_analytics [--rows 1000000]
+
+The list path loads Movie records with list_movies() and computes the
+mean, quartiles and per-decade averages in Python; the NumPy path uses
+analytics.load_arrays() and analytics.summarize().
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+import analytics
+from storage import T4W4movie_storage_sql as storage
+
+
+def list_path():
+    movies = storage.list_movies()
+    ratings = [movie.rating for movie in movies]
+    decades = defaultdict(list)
+    for movie in movies:
+        decades[movie.year // 10 * 10].append(movie.rating)
+    return {
+        "mean": statistics.mean(ratings),
+        "quartiles": statistics.quantiles(ratings, n=4),
+        "decade_averages": {decade: statistics.mean(values) for decade, values in decades.items()}
+    }
+
+
+def numpy_path():
+    years, ratings = analytics.load_arrays()
+    return analytics.summarize(years, ratings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        storage.bulk_add_movies(
+            {"title": f"Movie {i}", "year": 1900 + i * 7 % 125, "rating": (i * 13 % 100) / 10, "poster_url": None}
+            for i in range(args.rows)
+        )
+        for name, path in (("lists", list_path), ("numpy", numpy_path)):
+            start_time = time.perf_counter()
+            path()
+            print(f"{name:6} {time.perf_counter() - start_time:7.2f} s for {args.rows} movies")
+        storage.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
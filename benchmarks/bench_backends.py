@@ -0,0 +1,73 @@
+"""Throughput of every storage backend.
+
+Usage: python -m benchmarks.bench_backends [--rows 2000] [--backends sql json memory]
+
+Times the same workload (adds, lookups, filters, searches, stats,
+updates, deletes) on each backend in a temporary folder and prints
+operations per second. That the backends give the same answers is
+checked by tests/test_backends.py.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from storage import backends
+
+
+def create_backend(name, folder):
+    """Create a fresh, empty backend with its files in folder."""
+    if name == "sql":
+        return backends.SqlStorage(f"sqlite:///{os.path.join(folder, name + '.db')}")
+    if name == "json":
+        return backends.JsonStorage(os.path.join(folder, name + ".json"))
+    return backends.BACKENDS[name]()
+
+
+def run_workload(store, rows, rng):
+    """Run the timed workload, return {operation: (count, seconds)}."""
+    titles = [f"Movie {i}" for i in range(rows)]
+    timings = {}
+
+    def timed(operation, calls):
+        start_time = time.perf_counter()
+        count = 0
+        for call in calls:
+            call()
+            count += 1
+        timings[operation] = (count, time.perf_counter() - start_time)
+
+    timed("add", (lambda t=title, i=i: store.add_movie(t, 1900 + i % 125, (i % 100) / 10)
+                  for i, title in enumerate(titles)))
+    timed("get", (lambda t=rng.choice(titles): store.get_movie(t) for _ in range(rows)))
+    timed("find", (lambda r=rng.random() * 10: store.find_movies(min_rating=r, order_by="rating", limit=20)
+                   for _ in range(100)))
+    timed("search", (lambda n=rng.randrange(rows): store.search_movies(f"Movie {n}", limit=20)
+                     for _ in range(100)))
+    timed("stats", (store.get_rating_stats for _ in range(20)))
+    timed("update", (lambda t=rng.choice(titles): store.update_movie(t, rng.random() * 10, 2000)
+                     for _ in range(rows // 10)))
+    timed("delete", (lambda t=title: store.delete_movie(t) for title in titles[:rows // 10]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", choices=sorted(backends.BACKENDS),
+                        default=sorted(backends.BACKENDS))
+    args = parser.parse_args()
+
+    for name in args.backends:
+        with tempfile.TemporaryDirectory() as folder:
+            timings = run_workload(create_backend(name, folder), args.rows, random.Random(0))
+        print(f"{name:7}", "  ".join(
+            f"{operation} {count / seconds:9,.0f}/s" for operation, (count, seconds) in timings.items()
+        ))
+    if "sql" in args.backends:
+        backends.sql_storage.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
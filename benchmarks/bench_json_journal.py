@@ -0,0 +1,98 @@
+"""Sequential edits of the JSON movie file: full rewrites versus the journal.
+
+Usage: python -m benchmarks.bench_json_journal [--rows 1000] [--edits 10000]
+
+Applies the same --edits adds, updates and deletes to a data.json with
+--rows movies in three ways:
+
+    rewrite   the old storage: json.load() and json.dump(indent=2) per edit
+    snapshot  JsonMovieFile without journal: in-memory copy, atomic rewrite per edit
+    journal   JsonMovieFile with journal: one appended line per edit
+
+and checks that reopening the file gives the same movies every time.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from storage.json_file import JsonMovieFile
+
+
+def make_edits(rows, edits, seed=0):
+    """Return a list of (title, movie or None) changes."""
+    rng = random.Random(seed)
+    changes = []
+    for i in range(edits):
+        choice = rng.random()
+        if choice < 0.4:
+            changes.append((f"New movie {i}", {"rating": round(rng.uniform(1, 10), 1),
+                                                 "year_of_release": rng.randrange(1900, 2025)}))
+        elif choice < 0.9:
+            changes.append((f"Movie {rng.randrange(rows)}", {"rating": round(rng.uniform(1, 10), 1),
+                                                              "year_of_release": rng.randrange(1900, 2025)}))
+        else:
+            changes.append((f"Movie {rng.randrange(rows)}", None))
+    return changes
+
+
+def write_catalog(path, rows):
+    movies = {f"Movie {i}": {"rating": (i % 100) / 10, "year_of_release": 1900 + i % 125} for i in range(rows)}
+    with open(path, "w") as fileobj:
+        json.dump({"movies": movies}, fileobj, indent=2)
+
+
+def edit_by_rewriting(path, changes):
+    """What T3W4Codio_movie_storage did before: parse and rewrite everything per edit."""
+    for title, movie in changes:
+        with open(path, "r") as fileobj:
+            movies = json.load(fileobj)["movies"]
+        if movie is None:
+            movies.pop(title, None)
+        else:
+            movies[title] = movie
+        with open(path, "w") as fileobj:
+            json.dump({"movies": movies}, fileobj, indent=2)
+
+
+def edit_movie_file(path, changes, journal):
+    movie_file = JsonMovieFile(path, journal=journal)
+    for title, movie in changes:
+        if movie is None:
+            movie_file.delete(title)
+        else:
+            movie_file.set(title, movie)
+    return movie_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=10000)
+    args = parser.parse_args()
+
+    changes = make_edits(args.rows, args.edits)
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for mode in ("rewrite", "snapshot", "journal"):
+            path = os.path.join(folder, f"{mode}.json")
+            write_catalog(path, args.rows)
+            start_time = time.perf_counter()
+            if mode == "rewrite":
+                edit_by_rewriting(path, changes)
+            else:
+                # Not closed: reopening below must replay the journal like after a crash
+                edit_movie_file(path, changes, journal=(mode == "journal"))
+            seconds = time.perf_counter() - start_time
+            results[mode] = JsonMovieFile(path).movies
+            print(f"{mode:9} {args.edits} edits in {seconds:7.2f} s  "
+                  f"{args.edits / seconds:10,.0f} edits/s")
+
+    same = results["rewrite"] == results["snapshot"] == results["journal"]
+    print("reopened files agree:", "yes" if same else "NO")
+
+
+if __name__ == "__main__":
+    main()
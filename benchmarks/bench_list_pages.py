@@ -0,0 +1,59 @@
+"""Time to first row and peak memory of listing all movies.
+
+Usage: python -m benchmarks.bench_list_pages [--rows 1000000]
+
+Compares list_movies() (everything at once) with the keyset-paginated
+iter_movies_keyset() on a temporary database. With paging the peak
+memory stays flat as --rows grows.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from storage import T4W4movie_storage_sql as storage
+
+
+def all_at_once():
+    yield from storage.list_movies()
+
+
+def keyset_pages():
+    yield from storage.iter_movies_keyset(page_size=1000)
+
+
+def measure(listing):
+    """Return (seconds to first movie, total seconds, peak MiB) of one full listing."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    first_row = None
+    for _ in listing():
+        if first_row is None:
+            first_row = time.perf_counter() - start_time
+    total = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_row, total, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        storage.bulk_add_movies(
+            {"title": f"Movie {i}", "year": 1900 + i % 125, "rating": (i % 100) / 10, "poster_url": None}
+            for i in range(args.rows)
+        )
+        for name, listing in (("list_movies", all_at_once), ("keyset pages", keyset_pages)):
+            first_row, total, peak = measure(listing)
+            print(f"{name:13} first row {first_row * 1000:8.1f} ms  all rows {total:6.2f} s  "
+                  f"peak {peak:8.1f} MiB")
+        storage.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
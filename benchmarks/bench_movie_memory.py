@@ -0,0 +1,58 @@
+"""Memory used by N movies as dicts, as Movie records and as MovieColumns.
+
+Usage: python -m benchmarks.bench_movie_memory [--rows 1000000]
+
+Uses tracemalloc on synthetic rows (the same tuples a database cursor
+returns), so the numbers show the cost of the row representation only.
+"""
+import argparse
+import tracemalloc
+from array import array
+
+from storage.movie import Movie, MovieColumns
+
+
+def synthetic_rows(count):
+    for i in range(count):
+        yield f"Movie {i}", 1900 + i % 125, (i % 100) / 10, f"https://example.com/posters/{i}.jpg"
+
+
+def as_dicts(rows):
+    return [{"title": row[0], "year": row[1], "rating": row[2], "poster_url": row[3]} for row in rows]
+
+
+def as_records(rows):
+    return [Movie._make(row) for row in rows]
+
+
+def as_columns(rows):
+    columns = MovieColumns(titles=[], years=array("i"), ratings=array("d"))
+    for title, year, rating, _ in rows:
+        columns.titles.append(title)
+        columns.years.append(year)
+        columns.ratings.append(rating)
+    return columns
+
+
+def measure(build, count):
+    """Return the MiB still allocated by the built structure."""
+    tracemalloc.start()
+    result = build(synthetic_rows(count))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    for name, build in (("dicts", as_dicts), ("Movie records", as_records),
+                        ("columns (no posters)", as_columns)):
+        print(f"{name:21} {measure(build, args.rows):9.1f} MiB for {args.rows} movies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""fetch_movies() against a local stand-in OMDb server.
+
+Usage: python -m benchmarks.bench_omdb [--titles 200] [--latency 0.05] [--workers 8] [--rate 50]
+
+Serves OMDb-style JSON answers from a local HTTP server that answers each
+request after --latency seconds, then fetches --titles titles with
+omdb_client.fetch_movies():
+
+    serial   one worker
+    pool     --workers workers
+
+Both runs are limited to --rate requests per second by the token bucket.
+Every fifth title is unknown to the server and comes back as not found.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import omdb_client
+
+
+def make_answer(title, number):
+    """Return an OMDb answer for a found movie."""
+    return {
+        "Title": title,
+        "Year": str(1950 + number % 70),
+        "imdbRating": f"{1 + number % 90 / 10:.1f}",
+        "Poster": f"https://img.example.com/posters/{number}.jpg",
+        "Response": "True",
+    }
+
+
+def start_server(movies, latency=0.0):
+    """Serve /?t=<title>&apikey=... on a free port like OMDb does: movies
+    maps titles to answers, other titles get OMDb's "Movie not found!"
+    answer. Returns (server, base URL, list of (time, title) of the requests)."""
+    requests_served = []
+    lock = threading.Lock()
+
+    class OmdbHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            title = (parse_qs(urlparse(self.path).query).get("t") or [""])[0]
+            with lock:
+                requests_served.append((time.monotonic(), title))
+            time.sleep(latency)
+            answer = movies.get(title, {"Response": "False", "Error": "Movie not found!"})
+            body = json.dumps(answer).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OmdbHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/", requests_served
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=50)
+    args = parser.parse_args()
+
+    titles = [f"Movie {number}" for number in range(args.titles)]
+    movies = {title: make_answer(title, number) for number, title in enumerate(titles) if number % 5 != 4}
+    server, base_url, requests_served = start_server(movies, args.latency)
+
+    for name, workers in (("serial", 1), ("pool", args.workers)):
+        served_before = len(requests_served)
+        start_time = time.perf_counter()
+        results = omdb_client.fetch_movies(titles, "test-key", max_workers=workers,
+                                           requests_per_second=args.rate, base_url=base_url)
+        seconds = time.perf_counter() - start_time
+        found = sum(movie is not None for movie in results.values())
+        print(f"{name:7} {len(results)} titles in {seconds:6.2f} s  ({len(results) / seconds:6.1f}/s)  "
+              f"found {found}  requests {len(requests_served) - served_before}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Poster caching against a local stand-in image server.
+
+Usage: python -m benchmarks.bench_posters [--posters 200] [--latency 0.05] [--workers 8]
+
+Serves --posters generated JPEG posters from a local HTTP server that
+answers each request after --latency seconds (like a remote image host),
+then caches them with poster_cache.cache_posters():
+
+    serial   one worker, empty cache
+    pool     --workers workers, empty cache
+    rebuild  --workers workers, everything cached (nothing is downloaded)
+
+Every tenth URL serves the same image as another one, to show that
+identical posters are stored once.
+"""
+import argparse
+import io
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import poster_cache
+
+
+def make_poster(number):
+    """Return the bytes of a 600x900 JPEG in a colour depending on number."""
+    from PIL import Image
+
+    image = Image.new("RGB", (600, 900), ((number * 37) % 256, (number * 91) % 256, (number * 53) % 256))
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=90)
+    return output.getvalue()
+
+
+def start_server(posters, latency):
+    """Serve /poster/<n>.jpg on a free port; returns (server, request counter)."""
+    requests_served = [0]
+
+    class PosterHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            requests_served[0] += 1
+            number = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+            body = posters[number]
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PosterHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_served
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posters", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    # Every tenth poster repeats the image of the one before it
+    images = [make_poster(i - 1 if i % 10 == 9 else i) for i in range(args.posters)]
+    server, requests_served = start_server(images, args.latency)
+    urls = [f"http://127.0.0.1:{server.server_port}/poster/{i}.jpg" for i in range(args.posters)]
+
+    for name, workers, fresh_cache in (("serial", 1, True), ("pool", args.workers, True),
+                                       ("rebuild", args.workers, False)):
+        if fresh_cache:
+            folder = tempfile.mkdtemp()
+        served_before = requests_served[0]
+        start_time = time.perf_counter()
+        posters = poster_cache.cache_posters(urls, output_dir=folder, max_workers=workers)
+        seconds = time.perf_counter() - start_time
+        print(f"{name:8} {len(posters)} posters in {seconds:6.2f} s  "
+              f"downloaded {requests_served[0] - served_before}")
+
+    poster_dir = os.path.join(folder, poster_cache.POSTER_DIR)
+    files = [name for name in os.listdir(poster_dir) if name != poster_cache.INDEX_NAME]
+    original_bytes = sum(len(image) for image in images)
+    thumbnail_bytes = sum(os.path.getsize(os.path.join(poster_dir, path))
+                          for path in {src.split("/", 1)[1] for src in posters.values()})
+    print(f"{len(files)} files on disk for {args.posters} URLs; thumbnails {thumbnail_bytes / 1024:.0f} KiB "
+          f"instead of {original_bytes / 1024:.0f} KiB of originals")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Latency and uniformity of storage.random_movie().
+
+Usage: python -m benchmarks.bench_random_movie [--rows 1000000] [--picks 2000]
+
+Builds a temporary database with --rows movies, deletes every third one
+to leave gaps in the ids, then times --picks random picks. Uniformity is
+checked on a small catalog with a chi-square statistic over many picks.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from storage import T4W4movie_storage_sql as storage
+
+
+def fill(rows):
+    storage.bulk_add_movies(
+        {"title": f"Movie {i}", "year": 1900 + i % 125, "rating": (i % 100) / 10, "poster_url": None}
+        for i in range(rows)
+    )
+    with storage.get_engine().begin() as connection:
+        connection.exec_driver_sql("DELETE FROM movies WHERE id % 3 = 0")
+
+
+def chi_square(counts, expected):
+    return sum((count - expected) ** 2 / expected for count in counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--picks", type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'uniform.db')}")
+        fill(30)
+        movie_count = storage.count_movies()
+        picks = 20000
+        counts = Counter(storage.random_movie().title for _ in range(picks))
+        titles = [movie.title for movie in storage.iter_movies()]
+        statistic = chi_square([counts[title] for title in titles], picks / movie_count)
+        # 95% critical value of chi-square with 19 degrees of freedom is 30.1
+        print(f"uniformity: chi-square {statistic:.1f} over {movie_count} movies "
+              f"({'ok' if statistic < 30.1 else 'NOT uniform'} at 95%, df=19)")
+
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'latency.db')}")
+        fill(args.rows)
+        for name, kwargs in (("uniform", {}),
+                             ("weighted", {"weighted": True}),
+                             ("filtered", {"filters": {"min_rating": 9.5}})):
+            start_time = time.perf_counter()
+            for _ in range(args.picks):
+                storage.random_movie(**kwargs)
+            elapsed = time.perf_counter() - start_time
+            print(f"{name:9} {elapsed / args.picks * 1e6:9.1f} us per pick "
+                  f"({storage.count_movies()} movies)")
+        storage.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
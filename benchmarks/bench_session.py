@@ -0,0 +1,75 @@
+"""10k mixed operations with one commit per call vs. one storage.session().
+
+Usage: python -m benchmarks.bench_session [--operations 10000] [--pool queue]
+
+The mix is 40% add, 30% update, 20% get and 10% delete on a temporary
+database. The per-call run uses the module functions (one connection
+checkout and one commit each), the session run does the same calls
+inside a single unit of work.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from storage import T4W4movie_storage_sql as storage
+
+
+def operations(count, seed=1):
+    """Yield (operation, title) pairs of a reproducible mix."""
+    rng = random.Random(seed)
+    for i in range(count):
+        kind = rng.choices(("add", "update", "get", "delete"), weights=(4, 3, 2, 1))[0]
+        title = f"Movie {i}" if kind == "add" else f"Movie {rng.randrange(i + 1)}"
+        yield kind, title
+
+
+def per_call(count):
+    with contextlib.redirect_stdout(io.StringIO()):  # the module functions print
+        for kind, title in operations(count):
+            if kind == "add":
+                storage.add_movie(title, 2000, 7.5, None)
+            elif kind == "update":
+                storage.update_movie(title, 8.0, 2001)
+            elif kind == "get":
+                storage.get_movie(title)
+            else:
+                storage.delete_movie(title)
+
+
+def one_session(count):
+    with storage.session() as movie_session:
+        for kind, title in operations(count):
+            if kind == "add":
+                if movie_session.get(title) is None:
+                    movie_session.add(title, 2000, 7.5, None)
+            elif kind == "update":
+                movie_session.update(title, 8.0, 2001)
+            elif kind == "get":
+                movie_session.get(title)
+            else:
+                movie_session.delete(title)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=10000)
+    parser.add_argument("--pool", default="queue", choices=sorted(storage.POOL_CLASSES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, run in (("per call", per_call), ("session", one_session)):
+            db_file = os.path.join(folder, name.replace(" ", "_") + ".db")
+            storage.init_db(f"sqlite:///{db_file}", pool=args.pool)
+            start_time = time.perf_counter()
+            run(args.operations)
+            elapsed = time.perf_counter() - start_time
+            print(f"{name:9} {args.operations / elapsed:10.0f} ops/s  ({elapsed:.2f} s, pool={args.pool})")
+        storage.get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
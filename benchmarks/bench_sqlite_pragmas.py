@@ -0,0 +1,58 @@
+"""Compare SQLite's default pragmas with the tuned ones from storage/config.py.
+
+Usage: python -m benchmarks.bench_sqlite_pragmas [--rows 20000]
+
+Each setting gets a fresh temporary database. Inserts are committed one
+by one (like storage.add_movie), the scan reads the whole table.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from storage import config
+from storage import migrations
+from storage.T4W4movie_storage_sql import make_engine
+
+
+def run(pragmas, rows):
+    """Return (inserts per second, scanned rows per second) for one setting."""
+    with tempfile.TemporaryDirectory() as folder:
+        engine = make_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}",
+                             echo=False, pragmas=pragmas)
+        with engine.connect() as connection:
+            migrations.migrate(connection)
+
+            start_time = time.perf_counter()
+            for i in range(rows):
+                connection.execute(
+                    text("INSERT INTO movies (title, year, rating) VALUES (:title, :year, :rating)"),
+                    {"title": f"Movie {i}", "year": 1900 + i % 125, "rating": (i % 100) / 10}
+                )
+                connection.commit()
+            insert_rate = rows / (time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            scanned = len(connection.execute(
+                text("SELECT title, year, rating, poster_url FROM movies ORDER BY rating")
+            ).fetchall())
+            scan_rate = scanned / (time.perf_counter() - start_time)
+        engine.dispose()
+    return insert_rate, scan_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    settings = {"default": {}, "tuned": config.get_sqlite_pragmas()}
+    for name, pragmas in settings.items():
+        insert_rate, scan_rate = run(pragmas, args.rows)
+        print(f"{name:8} inserts: {insert_rate:10.0f} rows/s   scan: {scan_rate:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
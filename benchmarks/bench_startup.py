@@ -0,0 +1,58 @@
+"""Measure how long importing the CLI takes, using python -X importtime.
+
+Usage: python -m benchmarks.bench_startup [--budget-ms 500] [--top 10]
+
+Exits with status 1 if the total import time is over the budget, so it
+can be used as a check before merging.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_MODULE = "T3W4Codio_MovieProject_Advanced_Persistant_Storage"
+BUDGET_MS = 500.0
+# Imported on first use only; importing the CLI must not pull them in
+DEFERRED_MODULES = ("matplotlib", "numpy", "requests")
+
+
+def measure_imports(module=CLI_MODULE):
+    """Import module in a fresh interpreter and return
+    (total microseconds, [(cumulative microseconds, module name), ...])."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    timings = []
+    total = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), name.rstrip()))
+        if not name.startswith("  "):  # top-level import
+            total += int(cumulative)
+    return total, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total, timings = measure_imports()
+    for cumulative, name in sorted(timings, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:8.1f} ms  {name.strip()}")
+    print(f"Total import time: {total / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if total / 1000 > args.budget_ms:
+        print("Startup is over budget.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
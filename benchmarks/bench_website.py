@@ -0,0 +1,74 @@
+"""Compare the old string-concatenation website build with the streaming generator.
+
+Usage: python -m benchmarks.bench_website [--sizes 10000 100000 1000000]
+
+Movies are generated on the fly (no database), so only the rendering is
+measured. Reports wall time and peak memory (tracemalloc) per size.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import website_generator
+from storage.movie import Movie
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE = os.path.join(ROOT, "index_template.html")
+
+
+def synthetic_movies(count):
+    """Yield count fake movies."""
+    for i in range(count):
+        yield Movie(f"Movie {i}", 1900 + i % 125, (i % 100) / 10,
+                    f"https://example.com/posters/{i}.jpg")
+
+
+def concatenation_build(movies, output_dir):
+    """The previous generate_website: one big string, written at the end."""
+    html_cards = ''
+    for movie in movies:
+        html_cards += f"""
+        <div class="movie-card">
+            <h2>{movie.title}</h2>
+            <p>Year: {movie.year}</p>
+            <p>Rating: {movie.rating}</p>
+            <img src="{movie.poster_url}" alt="{movie.title} poster" class="movie-poster">
+        </div>
+        """
+    with open(TEMPLATE, "r") as f:
+        template = f.read()
+    with open(os.path.join(output_dir, "index.html"), "w") as f:
+        f.write(template.replace("__TEMPLATE_MOVIE_GRID__", html_cards))
+
+
+def streaming_build(movies, output_dir):
+    website_generator.generate_site(movies, TEMPLATE, output_dir, page_size=1000)
+
+
+def measure(build, count):
+    """Return (seconds, peak MiB) of one build."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        build(synthetic_movies(count), output_dir)
+        elapsed = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        for name, build in (("concatenation", concatenation_build), ("streaming", streaming_build)):
+            elapsed, peak = measure(build, count)
+            print(f"{count:>9} movies  {name:13}  {elapsed:8.2f} s  peak {peak:9.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
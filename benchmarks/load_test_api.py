@@ -0,0 +1,100 @@
+"""Requests per second and latency of the HTTP API under concurrent load.
+
+Usage: python -m benchmarks.load_test_api [--rows 100000] [--clients 8] [--seconds 10]
+
+Starts api_server on a temporary database and lets --clients threads
+fetch list pages (walking the keyset cursor), searches and stats over
+keep-alive connections. Half of the requests revalidate with
+If-None-Match, which should answer 304 without touching the movies.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import api_server
+from storage import T4W4movie_storage_sql as storage
+
+
+def client(port, deadline, seed, latencies, statuses):
+    """Send requests until the deadline, recording latency and status codes."""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    after_id = 0
+    while time.perf_counter() < deadline:
+        choice = rng.random()
+        if choice < 0.6:
+            path = f"/movies?limit=50&after_id={after_id}"
+        elif choice < 0.9:
+            path = f"/movies/search?q=movie+{rng.randrange(1000)}&limit=20"
+        else:
+            path = "/stats"
+        headers = {"Accept-Encoding": "gzip"}
+        if path in etags and rng.random() < 0.5:
+            headers["If-None-Match"] = etags[path]
+
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        etags[path] = response.getheader("ETag")
+        if path.startswith("/movies?") and response.status == 200:
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            after_id = json.loads(body)["next_after_id"] or 0
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        storage.bulk_add_movies(
+            {"title": f"Movie {i}", "year": 1900 + i % 125, "rating": (i % 100) / 10, "poster_url": None}
+            for i in range(args.rows)
+        )
+        server = api_server.make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        latencies = []
+        statuses = {}
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=client, args=(port, deadline, seed, latencies, statuses))
+            for seed in range(args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        server.shutdown()
+        server.server_close()
+        storage.get_engine().dispose()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests from {args.clients} clients in {args.seconds:.0f} s: "
+          f"{len(latencies) / args.seconds:,.0f} requests/s")
+    print(f"latency p50 {statistics.median(latencies) * 1000:.2f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f} ms  "
+          f"max {latencies[-1] * 1000:.2f} ms")
+    print("status codes:", ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Benchmark suite over seeded synthetic catalogs, with JSON results that
+can be compared between commits.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1k 100k] [--repeat 5] [--output results.json]
+    python -m benchmarks.suite --output new.json --compare old.json [--threshold 0.25]
+
+For every size a temporary database is filled with
+benchmarks.synthetic.generate_movies(size, --seed), then each benchmark
+runs --repeat times. The fastest run's time per operation is the number
+that is compared (other processes only ever make a run slower, so the
+minimum is the most stable figure): with --compare, every benchmark that
+got slower by more than --threshold (0.25 = 25%) against the baseline
+file is reported and the exit status is 1, so it can be used as a check
+before merging.
+
+Typical use: run it on the main branch with --output base.json, then on
+the changed branch with --compare base.json. Compare results from the
+same machine only.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import charts
+import website_generator
+from benchmarks.synthetic import generate_movies, parse_size
+from storage import T4W4movie_storage_sql as storage
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "index_template.html")
+SEARCH_WORDS = ["dark", "knight", "storm 1", "the lost", "kingdom", "midnight train", "reloaded", "zzz"]
+
+
+class Context:
+    """What the benchmarks share for one catalog size."""
+
+    def __init__(self, size, folder, seed, titles):
+        self.size = size
+        self.folder = folder
+        self.rng = random.Random(seed)
+        self.titles = titles  # a sample of existing titles
+        self.added = []  # titles added by bench_add, deleted again by bench_delete
+        self.added_count = 0
+
+
+# Each benchmark runs one round and returns the number of operations in it.
+
+def bench_add(context):
+    for _ in range(100):
+        context.added_count += 1
+        title = f"Benchmark movie {context.added_count}"
+        storage.add_movie(title, 2000, 5.0, None)
+        context.added.append(title)
+    return 100
+
+
+def bench_update(context):
+    for _ in range(100):
+        storage.update_movie(context.rng.choice(context.titles), round(context.rng.uniform(1, 10), 1), 2000)
+    return 100
+
+
+def bench_delete(context):
+    count = 0
+    while context.added and count < 100:
+        storage.delete_movie(context.added.pop())
+        count += 1
+    return count
+
+
+def bench_list_page(context):
+    page = storage.list_movies_page(50)
+    for _ in range(19):
+        page = storage.list_movies_page(50, after_id=page.last_id)
+    # and one page far into the catalog
+    storage.list_movies_page(50, after_id=context.rng.randrange(context.size))
+    return 21
+
+
+def bench_list_sorted(context):
+    for descending in (False, True):
+        storage.find_movies(order_by="rating", descending=descending, limit=100)
+        storage.find_movies(min_rating=8, year_range=(1990, 2010), order_by="year", limit=100)
+    return 4
+
+
+def bench_list_all(context):
+    for _ in storage.iter_movies():
+        pass
+    return 1
+
+
+def bench_search(context):
+    for words in SEARCH_WORDS:
+        storage.search_movies(words, limit=50)
+    return len(SEARCH_WORDS)
+
+
+def bench_suggest(context):
+    for words in ("drak knigt", "midnigt", "kingdon 42"):
+        storage.suggest_movies(words)
+    return 3
+
+
+def bench_stats(context):
+    for _ in range(10):
+        storage.get_rating_stats()
+    return 10
+
+
+def bench_random(context):
+    for _ in range(100):
+        storage.random_movies(1, rng=context.rng)
+    return 100
+
+
+def bench_histogram(context):
+    for _ in range(10):
+        charts.chart_data("ratings")
+    return 10
+
+
+def bench_year_histogram(context):
+    charts.chart_data("years")
+    return 1
+
+
+def bench_chart_render(context):
+    charts.render_bar_chart(os.path.join(context.folder, "chart.png"), "Ratings",
+                            *charts.chart_data("ratings"))
+    return 1
+
+
+def bench_website_full(context):
+    website_generator.generate_site(storage.iter_movies(), TEMPLATE_PATH,
+                                    os.path.join(context.folder, "site"), page_size=1000)
+    return 1
+
+
+def bench_website_incremental(context):
+    website_generator.update_site(storage.iter_movie_revisions(), storage.movies_in_id_range,
+                                  TEMPLATE_PATH, os.path.join(context.folder, "site"), page_size=1000)
+    return 1
+
+
+def prepare_website_incremental(context):
+    """Make sure there is a manifest, then change a few movies, so every
+    round rewrites some pages instead of finding nothing to do."""
+    site_folder = os.path.join(context.folder, "site")
+    if not os.path.exists(os.path.join(site_folder, website_generator.MANIFEST_NAME)):
+        bench_website_incremental(context)
+    for title in context.rng.sample(context.titles, min(5, len(context.titles))):
+        storage.update_movie(title, round(context.rng.uniform(1, 10), 1), 2000)
+
+
+BENCHMARKS = {
+    "add": bench_add,
+    "update": bench_update,
+    "delete": bench_delete,
+    "list_page": bench_list_page,
+    "list_sorted": bench_list_sorted,
+    "list_all": bench_list_all,
+    "search": bench_search,
+    "suggest": bench_suggest,
+    "stats": bench_stats,
+    "random": bench_random,
+    "histogram": bench_histogram,
+    "year_histogram": bench_year_histogram,
+    "chart_render": bench_chart_render,
+    "website_full": bench_website_full,
+    "website_incremental": bench_website_incremental,
+}
+
+# Run before every round of a benchmark, outside the timing
+SETUPS = {
+    "website_incremental": prepare_website_incremental,
+}
+
+
+def run_size(size, names, repeat, seed):
+    """Build a catalog of size movies and run the benchmarks on it.
+    Returns {benchmark: result dict}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        storage.init_db(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        titles = []
+
+        def sample_titles(movies):
+            for number, movie in enumerate(movies):
+                if number % max(1, size // 1000) == 0:
+                    titles.append(movie["title"])
+                yield movie
+
+        report = storage.bulk_add_movies(sample_titles(generate_movies(size, seed)), batch_size=5000)
+        results["bulk_load"] = {"operations": size, "runs": 1, "seconds": [report["seconds"]],
+                                "median_per_op": report["seconds"] / size,
+                                "min_per_op": report["seconds"] / size}
+        os.makedirs(os.path.join(folder, "site"))
+        context = Context(size, folder, seed, titles)
+
+        for name in names:
+            seconds = []
+            operations = 0
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):  # the storage functions print
+                    if name in SETUPS:
+                        SETUPS[name](context)
+                    start_time = time.perf_counter()
+                    operations = BENCHMARKS[name](context)
+                    seconds.append(time.perf_counter() - start_time)
+            results[name] = {
+                "operations": operations,
+                "runs": repeat,
+                "seconds": seconds,
+                "median_per_op": statistics.median(seconds) / max(operations, 1),
+                "min_per_op": min(seconds) / max(operations, 1)
+            }
+        storage.get_engine().dispose()
+    return results
+
+
+def describe_environment(seed, repeat):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.1f} µs"
+
+
+def compare(results, baseline, threshold):
+    """Print current vs. baseline fastest runs; returns the list of regressions."""
+    regressions = []
+    print(f"\n{'size':>8} {'benchmark':22} {'baseline':>11} {'current':>11} {'change':>8}")
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if old is None or result["runs"] < 2:
+                continue  # a single run (bulk_load) is too noisy to judge
+            ratio = result["min_per_op"] / old["min_per_op"]
+            flag = ""
+            if ratio > 1 + threshold:
+                regressions.append((size, name, ratio))
+                flag = "  REGRESSION"
+            print(f"{size:>8} {name:22} {format_seconds(old['min_per_op'])} "
+                  f"{format_seconds(result['min_per_op'])} {ratio - 1:+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k"],
+                        help="catalog sizes, e.g. 1k 100k 1m (default: 1k 100k)")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown that counts as a regression (default: 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = {}
+    for size_text in args.sizes:
+        size = parse_size(size_text)
+        print(f"{size} movies:")
+        results[size_text] = run_size(size, args.benchmarks, args.repeat, args.seed)
+        for name, result in results[size_text].items():
+            print(f"    {name:22} {format_seconds(result['min_per_op'])} per operation "
+                  f"(median {format_seconds(result['median_per_op']).strip()})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": describe_environment(args.seed, args.repeat), "results": results},
+                      f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than the baseline.")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
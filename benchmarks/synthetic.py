@@ -0,0 +1,40 @@
+"""Seeded synthetic movie catalogs for the benchmarks.
+
+generate_movies(count, seed) always yields the same movies for the same
+arguments: unique titles built from a small vocabulary (so searches hit
+many titles, like real ones), years weighted towards recent decades,
+ratings roughly normal around 6.5 and a poster URL for 80% of the movies.
+"""
+import random
+
+ADJECTIVES = [
+    "Dark", "Silent", "Lost", "Last", "Golden", "Broken", "Hidden", "Red", "Wild", "Eternal",
+    "Little", "Final", "Secret", "Frozen", "Burning", "Empty", "Crimson", "Midnight", "Distant", "Brave",
+]
+NOUNS = [
+    "Knight", "River", "City", "Dream", "Empire", "Road", "Island", "Star", "Garden", "Storm",
+    "Heart", "Shadow", "Kingdom", "Ocean", "Machine", "Forest", "Mirror", "Winter", "Planet", "Train",
+]
+SUFFIXES = ["", "", "", " Returns", " II", " III", ": The Beginning", " Rising", " of the Night", " Reloaded"]
+
+
+def make_title(number, rng):
+    """A readable title; the number at the end keeps titles unique."""
+    return f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}{rng.choice(SUFFIXES)} {number}"
+
+
+def generate_movies(count, seed=0):
+    """Yield count movie dicts (title, year, rating, poster_url)."""
+    rng = random.Random(seed)
+    for number in range(count):
+        year = min(2025, int(1900 + 125 * rng.random() ** 0.5))
+        rating = round(min(10.0, max(1.0, rng.gauss(6.5, 1.5))), 1)
+        poster_url = f"https://img.example.com/posters/{number}.jpg" if rng.random() < 0.8 else None
+        yield {"title": make_title(number, rng), "year": year, "rating": rating, "poster_url": poster_url}
+
+
+def parse_size(text):
+    """'1k' -> 1000, '100k' -> 100000, '1m' -> 1000000, '250' -> 250."""
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
@@ -0,0 +1,117 @@
+"""Chart rendering in a background process with an on-disk cache.
+
+Charts are drawn with matplotlib's Agg backend (no GUI) in a worker
+process, so the menu stays responsive. Every chart is cached in
+CACHE_DIR under a fingerprint of the data (row count + catalog
+revision); asking for an unchanged chart copies the cached PNG instead
+of drawing it again.
+"""
+import glob
+import os
+import shutil
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from storage import T4W4movie_storage_sql as storage
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chart_cache")
+
+CHART_TITLES = {
+    "ratings": "Movie Rating Distribution",
+    "years": "Movies per Release Year",
+    "decades": "Average Rating by Decade",
+}
+
+_executor = None
+
+
+def get_executor():
+    """The worker process pool, started on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=1)
+    return _executor
+
+
+def data_fingerprint():
+    """Changes whenever a movie is added, updated or deleted."""
+    return f"{storage.count_movies()}-{storage.get_catalog_revision()}"
+
+
+def chart_data(chart_type):
+    """Return the bars of a chart as (lefts, heights, width, xlabel, ylabel).
+    Small lists only, so they are cheap to send to the worker process."""
+    if chart_type == "ratings":
+        # Precomputed bins, kept up to date by the database
+        histogram = storage.get_rating_histogram()
+        return ([bucket for bucket, _ in histogram], [count for _, count in histogram],
+                1, "Rating", "Number of Movies")
+
+    import analytics  # imported here, NumPy is only needed for these charts
+
+    years, ratings = analytics.load_arrays()
+    if chart_type == "years":
+        counts, edges = analytics.year_histogram(years)
+        return (edges[:-1].tolist(), counts.tolist(), 5, "Release year", "Number of Movies")
+    if chart_type == "decades":
+        averages = analytics.decade_averages(years, ratings)
+        decades = sorted(averages)
+        return (decades, [averages[decade][1] for decade in decades], 10, "Decade", "Average rating")
+    raise ValueError(f"Unknown chart type '{chart_type}'.")
+
+
+def render_bar_chart(path, title, lefts, heights, width, xlabel, ylabel):
+    """Draw a bar chart to path. Runs in the worker process."""
+    import matplotlib
+    matplotlib.use("Agg")  # headless, must be set before pyplot is imported
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 6))
+    plt.bar(lefts, heights, width=width, align='edge', edgecolor='black', color='skyblue')
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # Write to a temporary name first, so a half-written file is never served from the cache
+    temporary_path = path + ".tmp"
+    plt.savefig(temporary_path, format="png")
+    plt.close()
+    os.replace(temporary_path, path)
+    return path
+
+
+def remove_old_charts(chart_type, keep_path):
+    """Delete cached charts of this type drawn from older data."""
+    for path in glob.glob(os.path.join(CACHE_DIR, f"{chart_type}-*.png")):
+        if path != keep_path:
+            os.remove(path)
+
+
+def request_chart(chart_type, filename):
+    """Save the chart as filename and return a Future with the filename.
+    A cached chart is copied right away (the Future is already done),
+    otherwise it is drawn in the worker process."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_path = os.path.join(CACHE_DIR, f"{chart_type}-{data_fingerprint()}.png")
+
+    if os.path.exists(cache_path):
+        future = Future()
+        shutil.copyfile(cache_path, filename)
+        future.set_result(filename)
+        return future
+
+    lefts, heights, width, xlabel, ylabel = chart_data(chart_type)
+    rendering = get_executor().submit(render_bar_chart, cache_path, CHART_TITLES[chart_type],
+                                      lefts, heights, width, xlabel, ylabel)
+    future = Future()
+
+    def copy_when_done(done):
+        try:
+            shutil.copyfile(done.result(), filename)
+            remove_old_charts(chart_type, cache_path)
+            future.set_result(filename)
+        except Exception as e:
+            future.set_exception(e)
+
+    rendering.add_done_callback(copy_when_done)
+    return future
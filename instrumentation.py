@@ -0,0 +1,211 @@
+"""In-process timings of menu actions, CLI commands, OMDb requests and
+SQL statements.
+
+Durations are recorded in the module-level `registry` under a metric
+name and a label (the command, or the SQL statement). For every pair it
+keeps the count, the sum, the maximum and the last SAMPLE_SIZE durations,
+from which p50/p95/p99 are computed. The registry can be written as JSON
+or in the Prometheus text format:
+
+    with instrumentation.registry.time("import_seconds", "csv"):
+        ...
+    instrumentation.instrument_engine(storage.get_engine())  # every SQL statement
+    print(instrumentation.registry.to_prometheus())
+
+run_command() times a command and, after enable_profiling(folder), also
+writes a cProfile file per call (open with python -m pstats <file> or
+snakeviz). Time spent inside an untimed() block, e.g. waiting for the
+user to type, is left out of the timings running on that thread.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+SAMPLE_SIZE = 10000  # durations kept per metric and label for the percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "movies_"
+# Prometheus label name per metric (default: "name")
+LABEL_NAMES = {
+    "menu_action_seconds": "action",
+    "cli_command_seconds": "command",
+    "omdb_request_seconds": "outcome",
+    "sql_statement_seconds": "statement",
+    "http_request_seconds": "route",
+}
+
+_profile_folder = None
+_local = threading.local()  # per thread: untimed seconds of each running time() block
+
+
+def percentile(sorted_values, quantile):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(quantile * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Timing:
+    """Count, sum, max and recent samples of one metric and label."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        summary = {"count": self.count, "sum": self.total, "max": self.maximum}
+        for quantile in QUANTILES:
+            summary[f"p{round(quantile * 100)}"] = percentile(samples, quantile) if samples else None
+        return summary
+
+
+class Registry:
+    """Thread-safe collection of timings: {metric: {label: Timing}}."""
+
+    def __init__(self):
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def observe(self, metric, label, seconds):
+        """Record one duration."""
+        with self.lock:
+            timing = self.timings.setdefault(metric, {}).get(label)
+            if timing is None:
+                timing = self.timings[metric][label] = Timing()
+            timing.add(seconds)
+
+    @contextmanager
+    def time(self, metric, label=""):
+        """Record how long the with block takes (also if it raises),
+        without the untimed() blocks inside it."""
+        untimed_seconds = _untimed_seconds()
+        untimed_seconds.append(0.0)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.observe(metric, label, elapsed - untimed_seconds.pop())
+
+    def clear(self):
+        with self.lock:
+            self.timings.clear()
+
+    def snapshot(self):
+        """Return {metric: {label: summary dict}}."""
+        with self.lock:
+            return {
+                metric: {label: timing.summary() for label, timing in labels.items()}
+                for metric, labels in self.timings.items()
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Return the timings in the Prometheus text format (one summary per metric)."""
+        lines = []
+        for metric, labels in sorted(self.snapshot().items()):
+            name = METRIC_PREFIX + metric
+            lines.append(f"# TYPE {name} summary")
+            for label, summary in sorted(labels.items()):
+                label_value = (label.replace("\\", "\\\\").replace('"', '\\"')
+                               .replace("\n", "\\n"))
+                label_text = f'{LABEL_NAMES.get(metric, "name")}="{label_value}"'
+                for quantile in QUANTILES:
+                    value = summary[f"p{round(quantile * 100)}"]
+                    lines.append(f'{name}{{{label_text},quantile="{quantile}"}} {value}')
+                lines.append(f"{name}_sum{{{label_text}}} {summary['sum']}")
+                lines.append(f"{name}_count{{{label_text}}} {summary['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the timings to path: Prometheus text for *.prom, JSON otherwise."""
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+
+registry = Registry()
+
+
+def _untimed_seconds():
+    if not hasattr(_local, "untimed_seconds"):
+        _local.untimed_seconds = []
+    return _local.untimed_seconds
+
+
+@contextmanager
+def untimed():
+    """Leave the with block out of the timings running on this thread."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        untimed_seconds = _untimed_seconds()
+        for index in range(len(untimed_seconds)):
+            untimed_seconds[index] += elapsed
+
+
+def normalize_statement(statement):
+    """One line per statement, so the same query always gets the same label."""
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def instrument_engine(engine, metric="sql_statement_seconds"):
+    """Time every SQL statement run on the engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("statement_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(connection, cursor, statement, parameters, context, executemany):
+        start_time = connection.info["statement_start_times"].pop()
+        registry.observe(metric, normalize_statement(statement), time.perf_counter() - start_time)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        # after_cursor_execute is not called for a failed statement
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("statement_start_times"):
+            connection.info["statement_start_times"].pop()
+
+
+def enable_profiling(folder):
+    """Write a cProfile file per run_command() call into folder."""
+    global _profile_folder
+    os.makedirs(folder, exist_ok=True)
+    _profile_folder = folder
+
+
+def run_command(metric, name, function, *args, **kwargs):
+    """Call function(*args, **kwargs), recording its duration as metric
+    with label name. With profiling enabled the call is also profiled
+    and written to <folder>/<name>-<time>.prof."""
+    if _profile_folder is None:
+        with registry.time(metric, name):
+            return function(*args, **kwargs)
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        with registry.time(metric, name):
+            return profiler.runcall(function, *args, **kwargs)
+    finally:
+        path = os.path.join(_profile_folder, f"{name}-{time.time_ns() // 1000000}.prof")
+        profiler.dump_stats(path)
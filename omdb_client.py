@@ -0,0 +1,138 @@
+"""Client for the OMDb API.
+
+A single requests.Session is shared so connections are kept alive and
+reused between requests. requests is imported on first use to keep the
+CLI startup fast. fetch_movies() resolves many titles at once on
+a thread pool, limited by a token bucket so the OMDb quota is respected.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+OMDB_URL = "http://www.omdbapi.com/"
+
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second on average
+    and bursts of up to `capacity` requests."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_session(pool_size=10):
+    """Return the shared keep-alive session (created on first use). Its
+    connection pool grows to pool_size if an earlier caller asked for less."""
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is None or pool_size > _session_pool_size:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = _session or requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+            _session_pool_size = pool_size
+    return _session
+
+
+def request_movie(title, api_key, session=None, base_url=OMDB_URL, timeout=10):
+    """Request a title from OMDb and return the raw JSON response as a dict.
+    Every request is timed in instrumentation.registry (omdb_request_seconds).
+    Raises requests.exceptions.RequestException on network or HTTP errors."""
+    session = session or get_session()
+    start_time = time.perf_counter()
+    outcome = "error"
+    try:
+        response = session.get(base_url, params={"t": title, "apikey": api_key}, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        outcome = "not_found" if data.get("Response") == "False" else "found"
+        return data
+    finally:
+        instrumentation.registry.observe("omdb_request_seconds", outcome, time.perf_counter() - start_time)
+
+
+def parse_movie(data):
+    """Convert an OMDb JSON response into a movie dict, or None if OMDb
+    did not find the movie."""
+    if data.get("Response") == "False":
+        return None
+
+    # Extract year
+    year_str = data.get("Year", "")
+    match = re.match(r"(\d{4})", year_str)
+    year_num = int(match.group(1)) if match else 0
+
+    # Extract and convert rating
+    rating_str = data.get("imdbRating", "0.0")
+    try:
+        rating = float(rating_str)
+    except ValueError:
+        rating = 0.0
+
+    return {
+        "title": data.get("Title", "Unknown"),
+        "year": year_num,
+        "rating": rating,
+        "poster_url": data.get("Poster", "")
+    }
+
+
+def fetch_movies(titles, api_key, max_workers=8, requests_per_second=10,
+                 base_url=OMDB_URL, cache=None):
+    """Fetch many titles concurrently.
+    At most max_workers requests are in flight and no more than
+    requests_per_second are started per second. Returns a dict mapping
+    each title to its movie dict, or to None if it was not found or the
+    request failed. If a cache (see storage.omdb_cache) is given, cached
+    titles are not requested and new answers are stored in it."""
+    import requests
+
+    titles = list(dict.fromkeys(titles))  # drop duplicates, keep order
+    bucket = TokenBucket(requests_per_second)
+    session = get_session(pool_size=max_workers)
+
+    def fetch(title):
+        if cache is not None:
+            movie = cache.lookup(title)
+            if movie is not cache.MISS:
+                return movie
+        bucket.acquire()
+        try:
+            start_time = time.perf_counter()
+            movie = parse_movie(request_movie(title, api_key, session, base_url))
+        except (requests.exceptions.RequestException, ValueError):
+            return None  # failed requests are not cached
+        if cache is not None:
+            cache.store(title, movie, time.perf_counter() - start_time)
+        return movie
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(titles, executor.map(fetch, titles)))
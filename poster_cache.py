@@ -0,0 +1,131 @@
+"""Local copies of the movie posters for the website.
+
+cache_posters() downloads the posters concurrently on a thread pool over
+the shared keep-alive session of omdb_client, stores them under
+<output_dir>/posters/ named by the SHA-256 of their content (the same
+image behind two URLs is stored once) and writes a thumbnail in the size
+the cards show, so pages load small local images instead of hot-linking
+the full-size remote ones. Thumbnails need Pillow; without it the
+original image is used.
+
+posters/index.json maps every poster URL to its files, so a rebuild only
+downloads URLs it has not seen. Failed downloads are retried after
+RETRY_FAILED_AFTER seconds.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import omdb_client
+from storage.atomic_file import atomic_write
+
+POSTER_DIR = "posters"
+INDEX_NAME = "index.json"
+THUMBNAIL_SIZE = (256, 386)  # twice the size of .movie-poster in style.css
+THUMBNAIL_QUALITY = 80
+RETRY_FAILED_AFTER = 24 * 60 * 60
+MAX_POSTER_BYTES = 20 * 2 ** 20
+
+
+def load_index(poster_dir):
+    """Return the URL index of the last run, or an empty one."""
+    try:
+        with open(os.path.join(poster_dir, INDEX_NAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def guess_extension(url, content_type):
+    extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip())
+    if extension in (None, ".jpe"):
+        extension = os.path.splitext(url.split("?")[0])[1].lower() or ".jpg"
+    return ".jpg" if extension == ".jpeg" else extension
+
+
+def make_thumbnail(data, path):
+    """Write a JPEG thumbnail of the image to path. Returns False if
+    Pillow is not installed or cannot read the image."""
+    try:
+        from io import BytesIO
+        from PIL import Image
+    except ImportError:
+        return False
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # JPEGs are decoded at a reduced scale right away (much faster than full size)
+            image.draft("RGB", THUMBNAIL_SIZE)
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    except (OSError, ValueError):
+        return False
+    with atomic_write(path) as f:
+        f.write(output.getvalue())
+    return True
+
+
+def download_poster(url, poster_dir, session, timeout=10):
+    """Download one poster and store it with its thumbnail.
+    Returns the index entry: file and thumbnail relative to poster_dir."""
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    data = response.content
+    if len(data) > MAX_POSTER_BYTES:
+        raise ValueError(f"Poster larger than {MAX_POSTER_BYTES} bytes.")
+
+    digest = hashlib.sha256(data).hexdigest()
+    filename = digest + guess_extension(url, response.headers.get("Content-Type"))
+    if not os.path.exists(os.path.join(poster_dir, filename)):
+        with atomic_write(os.path.join(poster_dir, filename)) as f:
+            f.write(data)
+
+    thumbnail = f"{digest}-{THUMBNAIL_SIZE[0]}.jpg"
+    if not os.path.exists(os.path.join(poster_dir, thumbnail)):
+        if not make_thumbnail(data, os.path.join(poster_dir, thumbnail)):
+            thumbnail = filename
+    return {"file": filename, "thumbnail": thumbnail}
+
+
+def is_cached(entry, poster_dir, now):
+    """True if the URL does not need to be downloaded (again)."""
+    if entry is None:
+        return False
+    if "error" in entry:
+        return now - entry["failed_at"] < RETRY_FAILED_AFTER
+    return os.path.exists(os.path.join(poster_dir, entry["thumbnail"]))
+
+
+def cache_posters(urls, output_dir=".", max_workers=8, session=None):
+    """Make sure the posters behind urls are stored locally and return a
+    dict mapping each cached URL to the path of its thumbnail relative to
+    output_dir (for the src of the img tag). URLs that could not be
+    downloaded are left out."""
+    import requests
+
+    poster_dir = os.path.join(output_dir, POSTER_DIR)
+    os.makedirs(poster_dir, exist_ok=True)
+    index = load_index(poster_dir)
+    now = time.time()
+    urls = [url for url in dict.fromkeys(urls) if url and url.startswith(("http://", "https://"))]
+    missing = [url for url in urls if not is_cached(index.get(url), poster_dir, now)]
+
+    if missing:
+        session = session or omdb_client.get_session(pool_size=max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(download_poster, url, poster_dir, session): url for url in missing}
+            for future in as_completed(futures):
+                try:
+                    index[futures[future]] = future.result()
+                except (requests.exceptions.RequestException, OSError, ValueError) as e:
+                    index[futures[future]] = {"error": str(e), "failed_at": now}
+        with atomic_write(os.path.join(poster_dir, INDEX_NAME), text=True) as f:
+            json.dump(index, f)
+
+    return {
+        url: f"{POSTER_DIR}/{index[url]['thumbnail']}"
+        for url in urls if url in index and "error" not in index[url]
+    }
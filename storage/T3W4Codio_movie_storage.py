@@ -1,52 +1,61 @@
-import json
+from . import config
+from .json_file import JsonMovieFile
+
+DATA_FILE = "data.json"
+
+_movie_file = None
+
+
+def get_movie_file():
+    """Returns the JsonMovieFile for data.json, loading it on first use.
+    Changes go to its journal unless MOVIES_JSON_JOURNAL=0."""
+    global _movie_file
+    if _movie_file is None:
+        _movie_file = JsonMovieFile(DATA_FILE, journal=config.JSON_JOURNAL,
+                                    compact_every=config.JSON_COMPACT_EVERY)
+    return _movie_file
+
 
 def get_movies():
-    """loads the JSON file and returns the movies"""
-    with open("data.json", "r") as fileobj:
-        data = json.load(fileobj)  # no need for json.loads(file.read())
-    return data["movies"]
+    """returns the movies (loaded once and kept in memory, do not modify
+    the returned dict, use the functions below or save_movies)"""
+    return get_movie_file().movies
 
 
 def save_movies(movies):
     """
     Gets all your movies as an argument and saves them to the JSON file.
+    The file is replaced atomically (written to a temporary file first).
     """
-    with open("data.json", "w") as fileobj:
-        json.dump({"movies": movies}, fileobj, indent=2)
+    get_movie_file().replace_all(movies)
 
 
 def add_movie(title, year, rating):
     """
     Adds a movie to the movies database.
-    Loads the information from the JSON file, add the movie,
-    and saves it. The function doesn't need to validate the input.
+    Only the change is written (appended to the journal).
+    The function doesn't need to validate the input.
     """
-    movies = get_movies()
-    movies[title] = {"rating": rating, "year_of_release": year}
-    save_movies(movies)
+    get_movie_file().set(title, {"rating": rating, "year_of_release": year})
 
 
 def delete_movie(title):
     """
     Deletes a movie from the movies database.
-    Loads the information from the JSON file, deletes the movie,
-    and saves it. The function doesn't need to validate the input.
+    Only the change is written (appended to the journal).
+    The function doesn't need to validate the input.
     """
-    movies = get_movies()
-    if title in movies:
-        del movies[title]
-        save_movies(movies)
+    movie_file = get_movie_file()
+    if title in movie_file.movies:
+        movie_file.delete(title)
 
 def update_movie(title, rating, year):
     """
     Updates a movie from the movies database.
-    Loads the information from the JSON file, updates the movie,
-    and saves it. The function doesn't need to validate the input.
+    Only the change is written (appended to the journal).
+    The function doesn't need to validate the input.
     """
-    movies = get_movies()
-    if title in movies:
-        movies[title]["rating"] = rating
-        movies[title]["year_of_release"] = year
-        save_movies(movies)
-
-
+    movie_file = get_movie_file()
+    if title in movie_file.movies:
+        movie = dict(movie_file.movies[title], rating=rating, year_of_release=year)
+        movie_file.set(title, movie)
@@ -1,67 +1,120 @@
-from sqlalchemy import create_engine, text
-import os
-
-# Define the database URL
-
-# Get the absolute path to the 'data' folder relative to this file's parent directory
-data_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-db_path = os.path.join(data_folder, "movies.db")
-
-# Use the absolute path in the DB URL (note: 3 slashes for absolute path)
-DB_URL = f"sqlite:///{db_path}"
-
-# Create the engine
-engine = create_engine(DB_URL, echo=True)
-
-# Create the movies table if it does not exist (with poster_url column)
-with engine.connect() as connection:
-    connection.execute(text("""
-        CREATE TABLE IF NOT EXISTS movies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT UNIQUE NOT NULL,
-            year INTEGER NOT NULL,
-            rating REAL NOT NULL,
-            poster_url TEXT
-        )
-    """))
-    connection.commit()
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from array import array
+from contextlib import contextmanager
+import difflib
+from itertools import islice
+import random
+import threading
+import time
 
+from . import config
+from . import migrations
+from .movie import Movie, MovieColumns, MoviePage
 
-def add_movie(title, year, rating, poster_url):
-    """Add a new movie to the database with poster URL."""
-    with engine.connect() as connection:
+# The database URL and engine settings come from storage/config.py
+DB_URL = config.DB_URL
+
+POOL_CLASSES = {"queue": QueuePool, "static": StaticPool, "null": NullPool}
+
+
+def make_engine(db_url=DB_URL, echo=config.SQL_ECHO, pragmas=None,
+                pool=config.DB_POOL, pool_size=config.DB_POOL_SIZE):
+    """Create an engine that sets the SQLite pragmas on every new connection.
+    pragmas defaults to config.SQLITE_PRAGMAS, pass {} to keep SQLite's defaults.
+    pool is "queue", "static" or "null" (see storage/config.py)."""
+    if pragmas is None:
+        pragmas = config.SQLITE_PRAGMAS
+    if pool not in POOL_CLASSES:
+        raise ValueError(f"Unknown connection pool '{pool}', use one of {sorted(POOL_CLASSES)}.")
+
+    engine_options = {"echo": echo, "poolclass": POOL_CLASSES[pool]}
+    if pool == "queue":
+        engine_options["pool_size"] = pool_size
+    if pool == "static" and db_url.startswith("sqlite"):
+        # The single shared connection may be used from several threads
+        engine_options["connect_args"] = {"check_same_thread": False}
+    new_engine = create_engine(db_url, **engine_options)
+
+    if new_engine.dialect.name == "sqlite" and pragmas:
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                if value not in (None, ""):
+                    cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return new_engine
+
+
+# The engine is created by init_db() (or on first use), not at import time
+engine = None
+# Held while the engine is replaced, so threads that hit first use at the
+# same time don't each create an engine and run the migrations
+_engine_lock = threading.RLock()
+
+
+def init_db(db_url=None, **engine_options):
+    """Create the engine and bring the schema up to date.
+    Called on first use; call it explicitly to use another database URL.
+    engine_options are passed on to make_engine()."""
+    global engine
+    with _engine_lock:
+        if engine is not None:
+            engine.dispose()
+            engine = None
+        new_engine = make_engine(db_url or DB_URL, **engine_options)
+
+        # Create the movies table and upgrade older databases to the current schema
         try:
-            connection.execute(
-                text("""
-                    INSERT INTO movies (title, year, rating, poster_url)
-                    VALUES (:title, :year, :rating, :poster_url)
-                """),
-                {"title": title, "year": year, "rating": rating, "poster_url": poster_url}
-            )
-            connection.commit()
-            print(f"Movie '{title}' added successfully.")
-        except Exception as e:
-            print(f"Error adding movie '{title}': {e}")
+            with new_engine.connect() as connection:
+                migrations.migrate(connection)
+        except BaseException:
+            new_engine.dispose()
+            raise
+        engine = new_engine
+    return new_engine
 
 
-def delete_movie(title):
-    """Delete a movie from the database."""
-    with engine.connect() as connection:
-        result = connection.execute(
+def get_engine():
+    """Return the engine, initializing the database if that hasn't happened yet."""
+    if engine is None:
+        with _engine_lock:
+            if engine is None:  # another thread may have initialized it meanwhile
+                return init_db()
+    return engine
+
+
+class MovieSession:
+    """Unit of work returned by session(): all calls share one connection
+    and are committed together. Unlike the module functions it doesn't
+    print anything; errors are raised and roll back the whole session."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def add(self, title, year, rating, poster_url=None):
+        """Add a new movie (raises if the title already exists)."""
+        self.connection.execute(
+            text("""
+                INSERT INTO movies (title, year, rating, poster_url)
+                VALUES (:title, :year, :rating, :poster_url)
+            """),
+            {"title": title, "year": year, "rating": rating, "poster_url": poster_url}
+        )
+
+    def delete(self, title):
+        """Delete a movie, returns False if there was no movie with that title."""
+        result = self.connection.execute(
             text("DELETE FROM movies WHERE title = :title"),
             {"title": title}
         )
-        connection.commit()
-        if result.rowcount == 0:
-            print(f"No movie found with title '{title}'.")
-        else:
-            print(f"Movie '{title}' deleted successfully.")
-
+        return result.rowcount > 0
 
-def update_movie(title, rating, year):
-    """Update a movie's rating and year in the database."""
-    with engine.connect() as connection:
-        result = connection.execute(
+    def update(self, title, rating, year):
+        """Update a movie's rating and year, returns False if there was no movie with that title."""
+        result = self.connection.execute(
             text("""
                 UPDATE movies
                 SET rating = :rating, year = :year
@@ -69,26 +122,613 @@ def update_movie(title, rating, year):
             """),
             {"title": title, "rating": rating, "year": year}
         )
-        connection.commit()
-        if result.rowcount == 0:
-            print(f"No movie found with title '{title}'.")
-        else:
-            print(f"Movie '{title}' updated successfully.")
+        return result.rowcount > 0
+
+    def get(self, title):
+        """Return the movie with the exact title, or None if it does not exist."""
+        row = self.connection.execute(
+            text("SELECT title, year, rating, poster_url FROM movies WHERE title = :title"),
+            {"title": title}
+        ).fetchone()
+        if row is None:
+            return None
+        return Movie._make(row)
+
+
+@contextmanager
+def session():
+    """Context manager for a unit of work:
+
+        with storage.session() as s:
+            s.add("Alien", 1979, 8.5)
+            s.update("Titanic", 8.0, 1997)
+
+    Everything is committed at the end of the with-block, or rolled back
+    if it raises."""
+    with get_engine().begin() as connection:
+        yield MovieSession(connection)
+
+
+def add_movie(title, year, rating, poster_url):
+    """Add a new movie to the database with poster URL."""
+    try:
+        with session() as movie_session:
+            movie_session.add(title, year, rating, poster_url)
+        print(f"Movie '{title}' added successfully.")
+    except Exception as e:
+        print(f"Error adding movie '{title}': {e}")
+
+
+def bulk_add_movies(movies, batch_size=1000, connection=None):
+    """Add many movies at once inside a single transaction.
+    movies can be any iterable (e.g. a generator) of Movie records or dicts
+    with the keys title, year, rating and poster_url; it is consumed in batches of
+    batch_size rows. A movie whose title already exists is updated instead.
+    Pass a connection to run inside the caller's transaction instead of a
+    new one. Returns a dict with the number of rows, inserted rows,
+    duplicates and the throughput in rows per second."""
+    if connection is None:
+        with get_engine().begin() as connection:
+            return bulk_add_movies(movies, batch_size, connection)
+
+    movies = iter(movies)
+    row_count = 0
+    start_time = time.perf_counter()
+    # movie_stats is kept up to date by triggers, no need to count the table
+    count_query = text("SELECT movie_count FROM movie_stats WHERE id = 1")
+
+    count_before = connection.execute(count_query).scalar()
+
+    while True:
+        batch = [
+            movie._asdict() if isinstance(movie, Movie) else {
+                "title": movie["title"],
+                "year": movie["year"],
+                "rating": movie["rating"],
+                "poster_url": movie.get("poster_url")
+            }
+            for movie in islice(movies, batch_size)
+        ]
+        if not batch:
+            break
+        # A list of parameter dicts makes SQLAlchemy use executemany()
+        connection.execute(
+            text("""
+                INSERT INTO movies (title, year, rating, poster_url)
+                VALUES (:title, :year, :rating, :poster_url)
+                ON CONFLICT(title) DO UPDATE SET
+                    year = excluded.year,
+                    rating = excluded.rating,
+                    poster_url = excluded.poster_url
+            """),
+            batch
+        )
+        row_count += len(batch)
+
+    count_after = connection.execute(count_query).scalar()
+
+    elapsed = time.perf_counter() - start_time
+    inserted = count_after - count_before
+    return {
+        "rows": row_count,
+        "inserted": inserted,
+        "duplicates": row_count - inserted,
+        "seconds": elapsed,
+        "rows_per_second": row_count / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def delete_movie(title):
+    """Delete a movie from the database."""
+    with session() as movie_session:
+        deleted = movie_session.delete(title)
+    if not deleted:
+        print(f"No movie found with title '{title}'.")
+    else:
+        print(f"Movie '{title}' deleted successfully.")
+
+
+def update_movie(title, rating, year):
+    """Update a movie's rating and year in the database."""
+    with session() as movie_session:
+        updated = movie_session.update(title, rating, year)
+    if not updated:
+        print(f"No movie found with title '{title}'.")
+    else:
+        print(f"Movie '{title}' updated successfully.")
 
 
 def list_movies():
-    """List all movies in the database, including poster URL."""
-    with engine.connect() as connection:
+    """List all movies in the database, including poster URL, as Movie records."""
+    with get_engine().connect() as connection:
         result = connection.execute(
             text("SELECT title, year, rating, poster_url FROM movies")
         )
         movies = result.fetchall()
-        return [
-            {
-                "title": row[0],
-                "year": row[1],
-                "rating": row[2],
-                "poster_url": row[3]
-            }
-            for row in movies
-        ]
\ No newline at end of file
+        return [Movie._make(row) for row in movies]
+
+
+# Columns that find_movies() is allowed to sort by (never interpolate user input)
+SORTABLE_COLUMNS = {"title", "year", "rating", "id"}
+
+
+def build_filters(min_rating=None, year_range=None, title_contains=None):
+    """Return the WHERE conditions and their parameters for the movie filters."""
+    conditions = []
+    params = {}
+
+    if min_rating is not None:
+        conditions.append("rating >= :min_rating")
+        params["min_rating"] = min_rating
+
+    if year_range is not None:
+        start_year, end_year = year_range
+        if start_year is not None:
+            conditions.append("year >= :start_year")
+            params["start_year"] = start_year
+        if end_year is not None:
+            conditions.append("year <= :end_year")
+            params["end_year"] = end_year
+
+    if title_contains:
+        # LIKE is case-insensitive for ASCII in SQLite; escape the wildcards
+        escaped = (title_contains.replace("\\", "\\\\")
+                   .replace("%", "\\%").replace("_", "\\_"))
+        conditions.append("title LIKE :title_pattern ESCAPE '\\'")
+        params["title_pattern"] = f"%{escaped}%"
+
+    return conditions, params
+
+
+def find_movies(min_rating=None, year_range=None, title_contains=None,
+                order_by=None, descending=False, limit=None, offset=None):
+    """Find movies matching the given filters.
+    Filtering, sorting and paging are done by SQLite, so only the
+    requested rows are loaded. year_range is a (start, end) tuple,
+    either end may be None."""
+    return list(iter_find_movies(min_rating, year_range, title_contains,
+                                 order_by, descending, limit, offset))
+
+
+def iter_find_movies(min_rating=None, year_range=None, title_contains=None,
+                     order_by=None, descending=False, limit=None, offset=None,
+                     batch_size=1000):
+    """Like find_movies(), but yields the movies while they are read from
+    the cursor (batch_size rows at a time) instead of returning a list."""
+    conditions, params = build_filters(min_rating, year_range, title_contains)
+
+    query = "SELECT title, year, rating, poster_url FROM movies"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    if order_by is not None:
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort movies by '{order_by}'.")
+        direction = "DESC" if descending else "ASC"
+        query += f" ORDER BY {order_by} {direction}"
+        if order_by not in ("title", "id"):
+            # id is the implicit last column of every index, so ties stay index-ordered
+            query += f", id {direction}"
+
+    if limit is not None:
+        query += " LIMIT :limit"
+        params["limit"] = limit
+        if offset is not None:
+            query += " OFFSET :offset"
+            params["offset"] = offset
+    elif offset is not None:
+        query += " LIMIT -1 OFFSET :offset"
+        params["offset"] = offset
+
+    with get_engine().connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(text(query), params)
+        for row in result:
+            yield Movie._make(row)
+
+
+def get_movie(title):
+    """Return the movie with the exact title, or None if it does not exist."""
+    with session() as movie_session:
+        return movie_session.get(title)
+
+
+def count_movies():
+    """Return the number of movies in the database (kept in movie_stats, no table scan)."""
+    with get_engine().connect() as connection:
+        return connection.execute(text("SELECT movie_count FROM movie_stats WHERE id = 1")).scalar()
+
+
+def load_columns(min_rating=None, year_range=None, title_contains=None):
+    """Load the matching movies as MovieColumns (titles list plus array('i')
+    years and array('d') ratings) in id order, for analytics over many rows
+    without NumPy (see analytics.load_arrays() for NumPy arrays).
+    Much smaller than one record per movie."""
+    conditions, params = build_filters(min_rating, year_range, title_contains)
+    query = "SELECT title, year, rating FROM movies"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+
+    columns = MovieColumns(titles=[], years=array("i"), ratings=array("d"))
+    with get_engine().connect() as connection:
+        result = connection.execute(text(query), params)
+        for title, year, rating in result:
+            columns.titles.append(title)
+            columns.years.append(year)
+            columns.ratings.append(rating)
+    return columns
+
+
+def iter_movies(batch_size=1000, order_by="id"):
+    """Yield all movies one by one without loading the whole table.
+    Rows are fetched from the cursor batch_size at a time."""
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Cannot sort movies by '{order_by}'.")
+    with get_engine().connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(
+            text(f"SELECT title, year, rating, poster_url FROM movies ORDER BY {order_by}")
+        )
+        for row in result:
+            yield Movie._make(row)
+
+
+def list_movies_page(limit=20, after_id=None, before_id=None, offset=None, filters=None):
+    """Return one MoviePage of at most limit movies in id order.
+    after_id gives the page after a page ending with that id, before_id the
+    page before a page starting with that id (keyset pagination: the id
+    index jumps straight to the page, no matter how deep). offset skips
+    that many movies instead, for jumping to a page number. filters takes
+    the keyword arguments of find_movies() (min_rating, year_range,
+    title_contains)."""
+    conditions, params = build_filters(**(filters or {}))
+    params["limit"] = limit
+    order = "ASC"
+    if after_id is not None:
+        conditions.append("id > :after_id")
+        params["after_id"] = after_id
+    elif before_id is not None:
+        # Walk backwards from before_id, then restore ascending order below
+        conditions.append("id < :before_id")
+        params["before_id"] = before_id
+        order = "DESC"
+
+    query = "SELECT id, title, year, rating, poster_url FROM movies"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY id {order} LIMIT :limit"
+    if offset and after_id is None and before_id is None:
+        query += " OFFSET :offset"
+        params["offset"] = offset
+
+    with get_engine().connect() as connection:
+        rows = connection.execute(text(query), params).fetchall()
+    if before_id is not None:
+        rows.reverse()
+    if not rows:
+        return MoviePage(movies=[], first_id=None, last_id=None)
+    return MoviePage(
+        movies=[Movie._make(row[1:]) for row in rows],
+        first_id=rows[0][0],
+        last_id=rows[-1][0]
+    )
+
+
+def iter_movies_keyset(page_size=1000):
+    """Yield all movies in id order, fetched page by page with
+    list_movies_page(). Unlike iter_movies() no cursor or read transaction
+    stays open between pages, and memory is bounded by page_size."""
+    page = list_movies_page(page_size)
+    while page.movies:
+        yield from page.movies
+        page = list_movies_page(page_size, after_id=page.last_id)
+
+
+def get_catalog_revision():
+    """Return the revision counter of the movies table.
+    It grows with every insert, update and delete (maintained by triggers)."""
+    with get_engine().connect() as connection:
+        return connection.execute(
+            text("SELECT revision FROM catalog_revision WHERE id = 1")
+        ).scalar()
+
+
+def iter_movie_revisions(batch_size=1000, include_poster_url=False):
+    """Yield (id, revision) of every movie in id order, without loading the
+    other columns; (id, revision, poster_url) with include_poster_url=True."""
+    columns = "id, revision, poster_url" if include_poster_url else "id, revision"
+    with get_engine().connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(
+            text(f"SELECT {columns} FROM movies ORDER BY id")
+        )
+        for row in result:
+            yield tuple(row)
+
+
+def iter_poster_urls(batch_size=1000):
+    """Yield every distinct poster URL."""
+    with get_engine().connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(
+            text("SELECT DISTINCT poster_url FROM movies WHERE poster_url IS NOT NULL")
+        )
+        for row in result:
+            yield row[0]
+
+
+def movies_in_id_range(first_id, last_id):
+    """Return the movies with first_id <= id <= last_id in id order."""
+    with get_engine().connect() as connection:
+        result = connection.execute(
+            text("""
+                SELECT title, year, rating, poster_url FROM movies
+                WHERE id BETWEEN :first_id AND :last_id
+                ORDER BY id
+            """),
+            {"first_id": first_id, "last_id": last_id}
+        )
+        return [Movie._make(row) for row in result]
+
+
+def fts_phrase(words):
+    """Quote a string as an FTS5 phrase (double quotes are escaped by doubling them)."""
+    return '"' + words.replace('"', '""') + '"'
+
+
+def search_movies(search_string, limit=50):
+    """Search movies by title using the full-text indexes, best matches first.
+    First looks for the string anywhere in the title (like 'in'), then for
+    titles containing all words of the string as word prefixes."""
+    search_string = search_string.strip()
+    if not search_string:
+        return []
+
+    with get_engine().connect() as connection:
+        if len(search_string) >= 3:
+            # A trigram phrase matches exactly the titles containing the string
+            rows = connection.execute(
+                text("""
+                    SELECT m.title, m.year, m.rating, m.poster_url
+                    FROM movies_trigram JOIN movies AS m ON m.id = movies_trigram.rowid
+                    WHERE movies_trigram MATCH :phrase
+                    ORDER BY movies_trigram.rank, m.title
+                    LIMIT :limit
+                """),
+                {"phrase": fts_phrase(search_string), "limit": limit}
+            ).fetchall()
+        else:
+            # Too short for trigrams: the index on title is small enough to scan
+            return find_movies(title_contains=search_string, order_by="title", limit=limit)
+
+        if not rows:
+            words = search_string.split()
+            rows = connection.execute(
+                text("""
+                    SELECT m.title, m.year, m.rating, m.poster_url
+                    FROM movies_fts JOIN movies AS m ON m.id = movies_fts.rowid
+                    WHERE movies_fts MATCH :query
+                    ORDER BY movies_fts.rank, m.title
+                    LIMIT :limit
+                """),
+                {"query": " AND ".join(fts_phrase(word) + "*" for word in words), "limit": limit}
+            ).fetchall()
+
+    return [Movie._make(row) for row in rows]
+
+
+def suggest_movies(search_string, limit=5, cutoff=0.5, candidates=100):
+    """Return up to limit movies whose titles are similar to search_string
+    (for "Did you mean"). The trigram index picks the candidate titles that
+    share the most trigrams with the string, difflib ranks only those.
+    Short titles and swapped letters often share no trigram with the
+    string; then the candidates are the titles with a word starting with
+    the same letter as one of its words, those closest in length first."""
+    search_string = search_string.strip().lower()
+    if not search_string:
+        return []
+    trigrams = {search_string[i:i + 3] for i in range(len(search_string) - 2)}
+
+    with get_engine().connect() as connection:
+        rows = []
+        if trigrams:
+            rows = connection.execute(
+                text("""
+                    SELECT m.title, m.year, m.rating, m.poster_url
+                    FROM movies_trigram JOIN movies AS m ON m.id = movies_trigram.rowid
+                    WHERE movies_trigram MATCH :query
+                    ORDER BY movies_trigram.rank
+                    LIMIT :candidates
+                """),
+                {"query": " OR ".join(fts_phrase(trigram) for trigram in sorted(trigrams)),
+                 "candidates": candidates}
+            ).fetchall()
+
+        if not rows:
+            initials = sorted({word[0] for word in search_string.split()})
+            rows = connection.execute(
+                text("""
+                    SELECT m.title, m.year, m.rating, m.poster_url
+                    FROM movies_fts JOIN movies AS m ON m.id = movies_fts.rowid
+                    WHERE movies_fts MATCH :query
+                    ORDER BY ABS(LENGTH(m.title) - :length), m.title
+                    LIMIT :candidates
+                """),
+                {"query": " OR ".join(fts_phrase(initial) + "*" for initial in initials),
+                 "length": len(search_string), "candidates": candidates}
+            ).fetchall()
+
+    scored = []
+    for row in rows:
+        matcher = difflib.SequenceMatcher(None, search_string, row[0].lower())
+        score = matcher.ratio()
+        if score >= cutoff:
+            scored.append((score, row))
+    scored.sort(key=lambda item: item[0], reverse=True)
+
+    return [Movie._make(row) for _, row in scored[:limit]]
+
+
+def get_rating_stats():
+    """Return count, average, median, min and max rating plus the titles of
+    the best and worst movies, or None if there are no movies.
+    Count and sum come from the movie_stats table (kept up to date by
+    triggers), min, max and median are read from the rating index.
+    All reads see the same snapshot of the table."""
+    with get_engine().connect() as connection:
+        # pysqlite doesn't open a transaction for SELECTs; without one a
+        # delete committed between the reads moves the median OFFSET past
+        # the end. The pool rolls it back when the connection is returned.
+        connection.exec_driver_sql("BEGIN")
+        movie_count, rating_sum = connection.execute(
+            text("SELECT movie_count, rating_sum FROM movie_stats WHERE id = 1")
+        ).fetchone()
+        if not movie_count:
+            return None
+
+        min_rating, max_rating = connection.execute(
+            text("SELECT MIN(rating), MAX(rating) FROM movies")
+        ).fetchone()
+
+        # The middle one (odd count) or two (even count) ratings
+        middle = connection.execute(
+            text("SELECT rating FROM movies ORDER BY rating LIMIT :count OFFSET :offset"),
+            {"count": 2 - movie_count % 2, "offset": (movie_count - 1) // 2}
+        ).fetchall()
+        median_rating = sum(row[0] for row in middle) / len(middle)
+
+        def titles_with_rating(rating):
+            result = connection.execute(
+                text("SELECT title FROM movies WHERE rating = :rating ORDER BY title"),
+                {"rating": rating}
+            )
+            return [row[0] for row in result]
+
+        return {
+            "count": movie_count,
+            "average": rating_sum / movie_count,
+            "median": median_rating,
+            "min": min_rating,
+            "max": max_rating,
+            "best_titles": titles_with_rating(max_rating),
+            "worst_titles": titles_with_rating(min_rating)
+        }
+
+
+def get_rating_histogram():
+    """Return the number of movies per rating bucket as a list of
+    (bucket, count) pairs; bucket n holds the ratings n <= rating < n + 1."""
+    with get_engine().connect() as connection:
+        result = connection.execute(
+            text("SELECT bucket, movie_count FROM rating_histogram ORDER BY bucket")
+        )
+        return [(row[0], row[1]) for row in result]
+
+
+def recompute_stats(repair=False):
+    """Recompute the maintained statistics from the movies table.
+    Returns (maintained, recomputed) dicts with count, rating_sum and
+    histogram so they can be compared; with repair=True the maintained
+    values are overwritten with the recomputed ones."""
+    bucket = "MIN(MAX(CAST(rating AS INTEGER), 0), 9)"
+    with get_engine().connect() as connection:
+        row = connection.execute(
+            text("SELECT movie_count, rating_sum FROM movie_stats WHERE id = 1")
+        ).fetchone()
+        maintained = {
+            "count": row[0],
+            "rating_sum": row[1],
+            "histogram": dict(connection.execute(
+                text("SELECT bucket, movie_count FROM rating_histogram")
+            ).fetchall())
+        }
+
+        row = connection.execute(
+            text("SELECT COUNT(*), COALESCE(SUM(rating), 0) FROM movies")
+        ).fetchone()
+        histogram = {bucket_number: 0 for bucket_number in range(10)}
+        histogram.update(connection.execute(
+            text(f"SELECT {bucket}, COUNT(*) FROM movies GROUP BY 1")
+        ).fetchall())
+        recomputed = {"count": row[0], "rating_sum": row[1], "histogram": histogram}
+
+        if repair:
+            connection.execute(
+                text("UPDATE movie_stats SET movie_count = :count, rating_sum = :rating_sum WHERE id = 1"),
+                recomputed
+            )
+            connection.execute(
+                text("UPDATE rating_histogram SET movie_count = :count WHERE bucket = :bucket"),
+                [{"bucket": key, "count": value} for key, value in histogram.items()]
+            )
+            connection.commit()
+
+    return maintained, recomputed
+
+
+# Failed id probes before random_movies() falls back to counting the matching rows
+MAX_RANDOM_PROBES = 64
+
+
+def random_movies(k=1, filters=None, weighted=False, rng=random):
+    """Return up to k distinct random movies without loading the table.
+    filters takes the keyword arguments of find_movies() (min_rating,
+    year_range, title_contains). With weighted=True a movie's chance is
+    proportional to its rating.
+    Picks a random id between the smallest and largest id and looks it up
+    (one primary key lookup per probe), so every movie is equally likely
+    even with gaps left by deleted movies. If probes keep failing (sparse
+    ids or selective filters) it picks a random offset among the matching
+    rows instead."""
+    conditions, params = build_filters(**(filters or {}))
+    where = " AND ".join(conditions) or "1"
+    chosen = {}
+
+    with get_engine().connect() as connection:
+        # Separate queries, so each one is a single index lookup
+        low_id = connection.execute(text("SELECT MIN(id) FROM movies")).scalar()
+        high_id = connection.execute(text("SELECT MAX(id) FROM movies")).scalar()
+        if low_id is None:
+            return []
+        max_rating = None
+        if weighted:
+            max_rating = connection.execute(text("SELECT MAX(rating) FROM movies")).scalar()
+
+        def accept(row):
+            # Rejection sampling: keep a row with probability rating / max_rating
+            if not weighted or not max_rating:
+                return True
+            return rng.random() * max_rating < row[3]
+
+        failed_probes = 0
+        while len(chosen) < k and failed_probes < MAX_RANDOM_PROBES:
+            row = connection.execute(
+                text(f"SELECT id, title, year, rating, poster_url FROM movies "
+                     f"WHERE id = :probe_id AND {where}"),
+                {**params, "probe_id": rng.randint(low_id, high_id)}
+            ).fetchone()
+            if row is None or row[0] in chosen:
+                failed_probes += 1
+            elif accept(row):
+                chosen[row[0]] = row
+
+        if len(chosen) < k:
+            match_count = connection.execute(
+                text(f"SELECT COUNT(*) FROM movies WHERE {where}"), params
+            ).scalar()
+            attempts = 0
+            while len(chosen) < min(k, match_count) and attempts < k * MAX_RANDOM_PROBES:
+                attempts += 1
+                row = connection.execute(
+                    text(f"SELECT id, title, year, rating, poster_url FROM movies "
+                         f"WHERE {where} LIMIT 1 OFFSET :offset"),
+                    {**params, "offset": rng.randrange(match_count)}
+                ).fetchone()
+                # None if movies were deleted since they were counted
+                if row is not None and row[0] not in chosen and accept(row):
+                    chosen[row[0]] = row
+
+    return [Movie._make(row[1:]) for row in chosen.values()]
+
+
+def random_movie(filters=None, weighted=False):
+    """Return one random movie (see random_movies()), or None if none matches."""
+    movies = random_movies(1, filters, weighted)
+    return movies[0] if movies else None
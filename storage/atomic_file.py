@@ -0,0 +1,45 @@
+"""Atomic file replacement, used by the JSON store and the poster cache.
+
+    with atomic_write("data/data.json", text=True, fsync=True) as f:
+        json.dump(data, f)
+
+The data is written to a hidden temporary file next to the target and
+moved over it with os.replace() when the with block ends without an
+error, so readers see either the old or the new file, never a half
+written one. The new file keeps the permission bits of the file it
+replaces; a new file gets the usual mode (0666 minus the umask).
+"""
+import os
+import stat
+import uuid
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, text=False, fsync=False):
+    """Yield a file object (binary, or UTF-8 text with text=True) whose
+    content replaces path at the end of the with block. With fsync=True
+    the data is on disk before the file is replaced."""
+    folder, name = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(folder, f".{name}.{uuid.uuid4().hex}.tmp")
+    # Unlike mkstemp(), which always uses 0600, os.open() lets the kernel
+    # apply the umask
+    file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        if text:
+            fileobj = os.fdopen(file_descriptor, "w", encoding="utf-8")
+        else:
+            fileobj = os.fdopen(file_descriptor, "wb")
+        with fileobj:
+            yield fileobj
+            if fsync:
+                fileobj.flush()
+                os.fsync(fileobj.fileno())
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
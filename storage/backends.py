@@ -0,0 +1,257 @@
+"""One storage interface for the SQL, JSON and in-memory movie stores.
+
+MovieStorage is the interface (a Protocol, so any class with these
+methods fits). The backends:
+
+    SqlStorage     the SQLite database (T4W4movie_storage_sql)
+    JsonStorage    a JSON file in the format of T3W4Codio_movie_storage
+                   ({"movies": {title: {"rating", "year_of_release"}}})
+    MemoryStorage  a dict in memory, for tests and benchmarks
+
+get_storage() returns the backend selected in storage/config.py
+(MOVIES_STORAGE). All backends return Movie records and the same stats
+dict; only the order of search results with equal relevance may differ.
+"""
+import random
+import re
+import statistics
+from typing import Optional, Protocol
+
+from . import config
+from . import T4W4movie_storage_sql as sql_storage
+from .json_file import JsonMovieFile
+from .movie import Movie
+
+
+class MovieStorage(Protocol):
+    """What the programs need from a movie store."""
+
+    def add_movie(self, title: str, year: int, rating: float, poster_url: Optional[str] = None) -> bool:
+        """Add a movie, returns False if a movie with that title exists."""
+
+    def delete_movie(self, title: str) -> bool:
+        """Delete a movie, returns False if there was no movie with that title."""
+
+    def update_movie(self, title: str, rating: float, year: int) -> bool:
+        """Update rating and year, returns False if there was no movie with that title."""
+
+    def get_movie(self, title: str) -> Optional[Movie]:
+        """Return the movie with the exact title, or None."""
+
+    def list_movies(self) -> list:
+        """Return all movies in the order they were added."""
+
+    def count_movies(self) -> int:
+        """Return the number of movies."""
+
+    def find_movies(self, min_rating=None, year_range=None, title_contains=None,
+                    order_by=None, descending=False, limit=None) -> list:
+        """Filter, sort and limit like T4W4movie_storage_sql.find_movies()."""
+
+    def search_movies(self, search_string: str, limit: int = 50) -> list:
+        """Return movies whose title contains the string (or all its words
+        as word prefixes), best matches first."""
+
+    def get_rating_stats(self) -> Optional[dict]:
+        """Return the stats dict of T4W4movie_storage_sql.get_rating_stats(), or None."""
+
+    def random_movie(self) -> Optional[Movie]:
+        """Return a random movie, or None if there are none."""
+
+
+class SqlStorage:
+    """MovieStorage on the database of T4W4movie_storage_sql, which is
+    shared with the module functions (and so with the CLI and the API)."""
+
+    def __init__(self, db_url=None):
+        # Without a URL the current engine is used (created on first use);
+        # a URL switches the module, and everything using it, to that database
+        if db_url is not None:
+            sql_storage.init_db(db_url)
+
+    def add_movie(self, title, year, rating, poster_url=None):
+        with sql_storage.session() as movie_session:
+            if movie_session.get(title) is not None:
+                return False
+            movie_session.add(title, year, rating, poster_url)
+        return True
+
+    def delete_movie(self, title):
+        with sql_storage.session() as movie_session:
+            return movie_session.delete(title)
+
+    def update_movie(self, title, rating, year):
+        with sql_storage.session() as movie_session:
+            return movie_session.update(title, rating, year)
+
+    def get_movie(self, title):
+        return sql_storage.get_movie(title)
+
+    def list_movies(self):
+        return sql_storage.list_movies()
+
+    def count_movies(self):
+        return sql_storage.count_movies()
+
+    def find_movies(self, min_rating=None, year_range=None, title_contains=None,
+                    order_by=None, descending=False, limit=None):
+        return sql_storage.find_movies(min_rating, year_range, title_contains,
+                                       order_by, descending, limit)
+
+    def search_movies(self, search_string, limit=50):
+        return sql_storage.search_movies(search_string, limit)
+
+    def get_rating_stats(self):
+        return sql_storage.get_rating_stats()
+
+    def random_movie(self):
+        return sql_storage.random_movie()
+
+
+class MemoryStorage:
+    """MovieStorage on a dict of title -> Movie. Filtering and sorting
+    follow the SQL backend, including the order of ties."""
+
+    def __init__(self, movies=()):
+        self.movies = {movie.title: Movie(*movie) for movie in movies}
+
+    def changed(self, title):
+        """Called after every change of the movie with that title
+        (JsonStorage writes the change to its file here)."""
+
+    def add_movie(self, title, year, rating, poster_url=None):
+        if title in self.movies:
+            return False
+        self.movies[title] = Movie(title, year, rating, poster_url)
+        self.changed(title)
+        return True
+
+    def delete_movie(self, title):
+        if self.movies.pop(title, None) is None:
+            return False
+        self.changed(title)
+        return True
+
+    def update_movie(self, title, rating, year):
+        movie = self.movies.get(title)
+        if movie is None:
+            return False
+        self.movies[title] = movie._replace(rating=rating, year=year)
+        self.changed(title)
+        return True
+
+    def get_movie(self, title):
+        return self.movies.get(title)
+
+    def list_movies(self):
+        return list(self.movies.values())
+
+    def count_movies(self):
+        return len(self.movies)
+
+    def find_movies(self, min_rating=None, year_range=None, title_contains=None,
+                    order_by=None, descending=False, limit=None):
+        start_year, end_year = year_range or (None, None)
+        needle = title_contains.lower() if title_contains else None
+        movies = [
+            movie for movie in self.movies.values()
+            if (min_rating is None or movie.rating >= min_rating)
+            and (start_year is None or movie.year >= start_year)
+            and (end_year is None or movie.year <= end_year)
+            and (needle is None or needle in movie.title.lower())
+        ]
+
+        if order_by is not None:
+            if order_by not in sql_storage.SORTABLE_COLUMNS:
+                raise ValueError(f"Cannot sort movies by '{order_by}'.")
+            if order_by != "id":
+                if descending:
+                    # SQL breaks ties by id descending: newest first
+                    movies.reverse()
+                movies.sort(key=lambda movie: getattr(movie, order_by), reverse=descending)
+            elif descending:
+                movies.reverse()
+
+        return movies[:limit] if limit is not None else movies
+
+    def search_movies(self, search_string, limit=50):
+        search_string = search_string.strip().lower()
+        if not search_string:
+            return []
+        matches = [movie for movie in self.movies.values() if search_string in movie.title.lower()]
+        if not matches:
+            words = search_string.split()
+            matches = [
+                movie for movie in self.movies.values()
+                if all(re.search(r"\b" + re.escape(word), movie.title.lower()) for word in words)
+            ]
+        # Shorter titles first: the closer the title to the string, the better
+        matches.sort(key=lambda movie: (len(movie.title), movie.title))
+        return matches[:limit]
+
+    def get_rating_stats(self):
+        if not self.movies:
+            return None
+        ratings = [movie.rating for movie in self.movies.values()]
+        min_rating, max_rating = min(ratings), max(ratings)
+        return {
+            "count": len(ratings),
+            "average": sum(ratings) / len(ratings),
+            "median": statistics.median(ratings),
+            "min": min_rating,
+            "max": max_rating,
+            "best_titles": sorted(m.title for m in self.movies.values() if m.rating == max_rating),
+            "worst_titles": sorted(m.title for m in self.movies.values() if m.rating == min_rating)
+        }
+
+    def random_movie(self):
+        if not self.movies:
+            return None
+        return random.choice(list(self.movies.values()))
+
+
+class JsonStorage(MemoryStorage):
+    """MovieStorage on a JSON file in the format of the first version of
+    the program (keyed by title, the year stored as year_of_release).
+    The file is read once; changes are appended to its journal or rewrite
+    the file, see storage/json_file.py."""
+
+    def __init__(self, path=None, journal=None):
+        self.file = JsonMovieFile(
+            path or config.JSON_PATH,
+            journal=config.JSON_JOURNAL if journal is None else journal,
+            compact_every=config.JSON_COMPACT_EVERY
+        )
+        super().__init__(
+            Movie(title, entry["year_of_release"], entry["rating"], entry.get("poster_url"))
+            for title, entry in self.file.movies.items()
+        )
+
+    def changed(self, title):
+        movie = self.movies.get(title)
+        if movie is None:
+            self.file.delete(title)
+            return
+        entry = {"rating": movie.rating, "year_of_release": movie.year}
+        if movie.poster_url is not None:
+            entry["poster_url"] = movie.poster_url
+        self.file.set(title, entry)
+
+    def close(self):
+        """Fold the journal into the JSON file."""
+        self.file.close()
+
+
+BACKENDS = {
+    "sql": SqlStorage,
+    "json": JsonStorage,
+    "memory": MemoryStorage,
+}
+
+
+def get_storage(name=None):
+    """Create the backend with the given name (default: MOVIES_STORAGE)."""
+    name = name or config.STORAGE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', expected one of {', '.join(BACKENDS)}.")
+    return BACKENDS[name]()
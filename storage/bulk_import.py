@@ -0,0 +1,79 @@
+"""Import movies from a CSV or JSON-lines file into the SQL database.
+
+Usage:
+    python -m storage.bulk_import movies.csv
+    python -m storage.bulk_import movies.jsonl --batch-size 5000
+
+CSV files need a header row with the columns title, year, rating and
+(optionally) poster_url. JSON-lines files need one object with the same
+keys per line.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from . import T4W4movie_storage_sql as storage
+
+
+def read_csv_movies(path):
+    """Yield one movie dict per CSV row."""
+    with open(path, "r", newline="", encoding="utf-8") as fileobj:
+        for row in csv.DictReader(fileobj):
+            yield {
+                "title": row["title"],
+                "year": int(row["year"]),
+                "rating": float(row["rating"]),
+                "poster_url": row.get("poster_url") or None
+            }
+
+
+def read_jsonl_movies(path):
+    """Yield one movie dict per non-empty line of a JSON-lines file."""
+    with open(path, "r", encoding="utf-8") as fileobj:
+        for line in fileobj:
+            if not line.strip():
+                continue
+            movie = json.loads(line)
+            yield {
+                "title": movie["title"],
+                "year": int(movie["year"]),
+                "rating": float(movie["rating"]),
+                "poster_url": movie.get("poster_url")
+            }
+
+
+def read_movies(path, file_format=None):
+    """Pick the reader by file_format ('csv' or 'jsonl') or by the file extension."""
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = "jsonl" if extension in (".jsonl", ".ndjson") else "csv"
+    if file_format == "jsonl":
+        return read_jsonl_movies(path)
+    return read_csv_movies(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import movies from a CSV or JSONL file.")
+    parser.add_argument("path", help="file to import")
+    parser.add_argument("--format", choices=("csv", "jsonl"), dest="file_format",
+                        help="file format (default: guessed from the extension)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="rows per executemany() batch (default: 1000)")
+    args = parser.parse_args(argv)
+
+    try:
+        report = storage.bulk_add_movies(read_movies(args.path, args.file_format), args.batch_size)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error importing '{args.path}': {e}")
+        return 1
+
+    print(f"Imported {report['rows']} rows in {report['seconds']:.2f}s "
+          f"({report['rows_per_second']:.0f} rows/s)")
+    print(f"{report['inserted']} new movies, {report['duplicates']} duplicates updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Settings for the storage, read from environment variables.
+
+MOVIES_STORAGE             backend for storage.backends.get_storage(): "sql" (default), "json" or "memory"
+MOVIES_JSON_PATH           file of the "json" backend (default: <repo>/data/data.json)
+MOVIES_JSON_JOURNAL        "0" to rewrite the JSON file on every change instead of
+                           appending to its journal (default: on, see storage/json_file.py)
+MOVIES_JSON_COMPACT_EVERY  journal entries before they are folded into the JSON file (default: 1000)
+MOVIES_DB_URL              database URL (default: sqlite:///<repo>/data/movies.db)
+MOVIES_SQL_ECHO            "1" to log every SQL statement (default: off)
+MOVIES_DB_POOL             connection pool: "queue" (default), "static" or "null", see below
+MOVIES_DB_POOL_SIZE        connections kept open by the "queue" pool (default: 5)
+MOVIES_SQLITE_TUNING       "0" to keep SQLite's default pragmas (default: on)
+MOVIES_SQLITE_JOURNAL_MODE journal_mode pragma (default: WAL)
+MOVIES_SQLITE_SYNCHRONOUS  synchronous pragma (default: NORMAL)
+MOVIES_SQLITE_CACHE_SIZE   cache_size pragma, negative means KiB (default: -65536, 64 MB)
+MOVIES_SQLITE_MMAP_SIZE    mmap_size pragma in bytes (default: 268435456, 256 MB)
+MOVIES_SQLITE_TEMP_STORE   temp_store pragma (default: MEMORY)
+
+Connection pools for SQLite:
+  queue   keeps up to MOVIES_DB_POOL_SIZE connections open and reuses them,
+          one per thread at a time. Best for the CLI and the threaded tools.
+  static  one connection shared by everything. Needed for sqlite:///:memory:
+          (each new connection would be a new, empty database).
+  null    opens a new connection for every use, like before pooling.
+"""
+import os
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+data_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(data_folder, 'movies.db')}"
+DEFAULT_JSON_PATH = os.path.join(data_folder, "data.json")
+
+
+def get_bool(name, default=False):
+    """Read an on/off environment variable."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def get_sqlite_pragmas():
+    """Return the pragmas to set on every new SQLite connection (in order)."""
+    if not get_bool("MOVIES_SQLITE_TUNING", True):
+        return {}
+    return {
+        "journal_mode": os.environ.get("MOVIES_SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.environ.get("MOVIES_SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": os.environ.get("MOVIES_SQLITE_CACHE_SIZE", "-65536"),
+        "mmap_size": os.environ.get("MOVIES_SQLITE_MMAP_SIZE", "268435456"),
+        "temp_store": os.environ.get("MOVIES_SQLITE_TEMP_STORE", "MEMORY"),
+    }
+
+
+STORAGE_BACKEND = os.environ.get("MOVIES_STORAGE", "sql").strip().lower()
+JSON_PATH = os.environ.get("MOVIES_JSON_PATH", DEFAULT_JSON_PATH)
+JSON_JOURNAL = get_bool("MOVIES_JSON_JOURNAL", True)
+JSON_COMPACT_EVERY = int(os.environ.get("MOVIES_JSON_COMPACT_EVERY", "1000"))
+DB_URL = os.environ.get("MOVIES_DB_URL", DEFAULT_DB_URL)
+SQL_ECHO = get_bool("MOVIES_SQL_ECHO")
+DB_POOL = os.environ.get("MOVIES_DB_POOL", "queue").strip().lower()
+DB_POOL_SIZE = int(os.environ.get("MOVIES_DB_POOL_SIZE", "5"))
+SQLITE_PRAGMAS = get_sqlite_pragmas()
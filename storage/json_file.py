@@ -0,0 +1,120 @@
+"""The data.json movie file with an in-process copy, atomic writes and an
+optional append-only journal.
+
+The file keeps the format of the first version of the program:
+{"movies": {title: {"rating": ..., "year_of_release": ...}}}.
+
+Without the journal every change rewrites the whole file. With the
+journal a change only appends one JSON line to <file>.journal:
+
+    {"title": "Up", "movie": {"rating": 8.3, "year_of_release": 2009}}
+    {"title": "Up", "movie": null}          (deleted)
+
+The journal is replayed when the file is opened and folded into a new
+snapshot (compacted) on open and after every compact_every changes.
+Snapshots are written to a temporary file and moved over data.json with
+os.replace(), so a crash leaves either the old or the new file, never a
+half-written one. A crash while appending leaves at most a torn last
+journal line, which is skipped. Replaying is idempotent, so a crash
+between writing the snapshot and emptying the journal is harmless.
+
+Only one process should write the file at a time.
+"""
+import json
+import os
+
+from .atomic_file import atomic_write
+
+
+class JsonMovieFile:
+    """Movies of one data.json file, loaded once and kept in memory."""
+
+    def __init__(self, path, journal=True, compact_every=1000):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.use_journal = journal
+        self.compact_every = compact_every
+        self.journal_file = None
+        self.journal_length = 0
+        self.movies = self.load()
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path):
+            self.compact()
+
+    def load(self):
+        """Read the snapshot and replay the journal on top of it."""
+        movies = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as fileobj:
+                movies = json.load(fileobj)["movies"]
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as fileobj:
+                lines = fileobj.read().split("\n")
+            for number, line in enumerate(lines, 1):
+                if not line:
+                    continue
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    if number == len(lines):
+                        break  # torn last line of an interrupted append
+                    raise ValueError(f"{self.journal_path} line {number} is not valid JSON.")
+                self.apply(movies, change["title"], change["movie"])
+                self.journal_length += 1
+        return movies
+
+    @staticmethod
+    def apply(movies, title, movie):
+        if movie is None:
+            movies.pop(title, None)
+        else:
+            movies[title] = movie
+
+    def set(self, title, movie):
+        """Add or replace a movie (a dict with rating and year_of_release)."""
+        self.apply(self.movies, title, movie)
+        self.changed(title, movie)
+
+    def delete(self, title):
+        """Delete a movie if it exists."""
+        self.apply(self.movies, title, None)
+        self.changed(title, None)
+
+    def replace_all(self, movies):
+        """Replace all movies and write a new snapshot."""
+        self.movies = movies
+        self.compact()
+
+    def changed(self, title, movie):
+        if not self.use_journal:
+            self.compact()
+            return
+        if self.journal_file is None:
+            self.journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self.journal_file.write(json.dumps({"title": title, "movie": movie}) + "\n")
+        # Flushed to the OS, so a crash of the program loses nothing
+        # (a crash of the machine may lose the last changes)
+        self.journal_file.flush()
+        self.journal_length += 1
+        if self.journal_length >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Write all movies to a new snapshot and empty the journal."""
+        with atomic_write(self.path, text=True, fsync=True) as fileobj:
+            json.dump({"movies": self.movies}, fileobj, indent=2)
+
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, "w").close()
+        self.journal_length = 0
+
+    def close(self):
+        """Fold the journal into the snapshot and close the journal file."""
+        if self.journal_length:
+            self.compact()
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
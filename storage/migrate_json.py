@@ -0,0 +1,259 @@
+"""Move the movies of a data.json file of the first version of the
+program into the SQL database.
+
+Usage:
+    python -m storage.migrate_json data.json
+    python -m storage.migrate_json big.json --batch-size 5000 --checkpoint 200000
+
+The file ({"movies": {title: {"rating": ..., "year_of_release": ...}}})
+is parsed incrementally, one movie at a time, so memory use does not
+depend on the file size. Movies are inserted in batches; every
+--checkpoint movies the transaction is committed together with the
+position in the file (table json_import_progress). If the migration is
+interrupted, running the same command again continues after the last
+checkpoint. Movies whose title already exists are updated.
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+from itertools import islice
+
+from sqlalchemy import text
+
+from . import T4W4movie_storage_sql as storage
+
+CHUNK_SIZE = 1 << 20  # characters read at a time
+MAX_VALUE_SIZE = 64 << 20  # a single movie larger than this means the file is broken
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonMovieReader:
+    """Iterate over (title, movie dict) pairs of the "movies" object of a
+    JSON file without loading the file. byte_offset() is the position
+    after the last movie returned; pass it as start_offset to continue
+    there later."""
+
+    def __init__(self, path, start_offset=None, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.start_offset = start_offset
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.fileobj = None
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_dropped = 0
+
+    def __iter__(self):
+        raw_file = open(self.path, "rb")
+        if self.start_offset:
+            raw_file.seek(self.start_offset)
+            self.bytes_dropped = self.start_offset
+        self.fileobj = io.TextIOWrapper(raw_file, encoding="utf-8", newline="")
+        try:
+            if self.start_offset:
+                # Continue right after a movie of the "movies" object
+                yield from self.read_movies(first=False)
+            elif self.find_movies_object():
+                yield from self.read_movies(first=True)
+        finally:
+            self.fileobj.close()
+
+    def byte_offset(self):
+        """Return the byte position in the file after the last movie returned."""
+        return self.bytes_dropped + len(self.buffer[:self.pos].encode("utf-8"))
+
+    # Reading
+
+    def read_more(self):
+        """Append the next chunk of the file to the buffer, dropping what
+        has been parsed already."""
+        if self.pos:
+            self.bytes_dropped += len(self.buffer[:self.pos].encode("utf-8"))
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        if len(self.buffer) > MAX_VALUE_SIZE:
+            raise ValueError(f"Invalid JSON near byte {self.bytes_dropped} of '{self.path}'.")
+        chunk = self.fileobj.read(self.chunk_size)
+        if chunk:
+            self.buffer += chunk
+        else:
+            self.eof = True
+
+    def next_char(self):
+        """Skip whitespace and return the next character ('' at the end of the file)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.read_more()
+
+    def expect(self, characters):
+        char = self.next_char()
+        if not char or char not in characters:
+            raise ValueError(f"Expected one of {characters!r} at byte {self.byte_offset()} "
+                             f"of '{self.path}', found {char!r}.")
+        self.pos += 1
+        return char
+
+    def decode_value(self):
+        """Decode the JSON value at the current position, reading more of
+        the file while the value is cut off at the end of the buffer."""
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"{e.msg} at byte {self.byte_offset()} of '{self.path}'.")
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+    # Structure
+
+    def find_movies_object(self):
+        """Move to the start of the "movies" object, returns False if the
+        file has none."""
+        self.expect("{")
+        if self.next_char() == "}":
+            return False
+        while True:
+            key = self.decode_value()
+            self.expect(":")
+            if key == "movies":
+                self.expect("{")
+                return True
+            self.decode_value()  # skip other keys
+            if self.expect(",}") == "}":
+                return False
+
+    def read_movies(self, first):
+        """Yield the (title, movie) pairs of the "movies" object."""
+        if first:
+            if self.next_char() == "}":
+                self.pos += 1
+                return
+        elif self.expect(",}") == "}":
+            return
+        while True:
+            title = self.decode_value()
+            self.expect(":")
+            movie = self.decode_value()
+            yield title, movie
+            if self.expect(",}") == "}":
+                return
+
+
+def to_row(title, movie):
+    """Map a movie of data.json to the columns of the movies table."""
+    try:
+        return {
+            "title": title,
+            "year": int(movie["year_of_release"]),
+            "rating": float(movie["rating"]),
+            "poster_url": movie.get("poster_url")
+        }
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"The movie '{title}' needs a rating and a year_of_release.")
+
+
+def migrate_json(path, batch_size=1000, checkpoint_rows=100000, restart=False, report=print):
+    """Import the movies of a data.json file, continuing an interrupted
+    import of the same (unchanged) file unless restart is True.
+    Returns a dict with the number of rows, bytes, seconds and the
+    throughput in rows and MB per second of this run."""
+    source = os.path.abspath(path)
+    file_stat = os.stat(path)
+    engine = storage.get_engine()
+
+    with engine.connect() as connection:
+        progress = connection.execute(
+            text("SELECT file_size, modified_ns, byte_offset, movie_count "
+                 "FROM json_import_progress WHERE source = :source"),
+            {"source": source}
+        ).fetchone()
+
+    start_offset, movie_count = 0, 0
+    if progress is not None and not restart:
+        if (progress[0], progress[1]) == (file_stat.st_size, file_stat.st_mtime_ns):
+            start_offset, movie_count = progress[2], progress[3]
+            report(f"Continuing after {movie_count} movies (byte {start_offset}).")
+        else:
+            report("The file has changed since the last run, starting over.")
+
+    reader = JsonMovieReader(path, start_offset)
+    rows = (to_row(title, movie) for title, movie in reader)
+    rows_this_run = 0
+    start_time = time.perf_counter()
+
+    while True:
+        with engine.begin() as connection:
+            result = storage.bulk_add_movies(islice(rows, checkpoint_rows), batch_size, connection)
+            if not result["rows"]:
+                break
+            movie_count += result["rows"]
+            rows_this_run += result["rows"]
+            connection.execute(
+                text("""
+                    INSERT INTO json_import_progress (source, file_size, modified_ns, byte_offset, movie_count)
+                    VALUES (:source, :file_size, :modified_ns, :byte_offset, :movie_count)
+                    ON CONFLICT(source) DO UPDATE SET
+                        file_size = excluded.file_size,
+                        modified_ns = excluded.modified_ns,
+                        byte_offset = excluded.byte_offset,
+                        movie_count = excluded.movie_count
+                """),
+                {"source": source, "file_size": file_stat.st_size, "modified_ns": file_stat.st_mtime_ns,
+                 "byte_offset": reader.byte_offset(), "movie_count": movie_count}
+            )
+        report(f"{movie_count} movies, {reader.byte_offset() / file_stat.st_size:.0%} of the file")
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM json_import_progress WHERE source = :source"),
+                           {"source": source})
+
+    elapsed = time.perf_counter() - start_time
+    byte_count = file_stat.st_size - start_offset
+    return {
+        "rows": rows_this_run,
+        "total_rows": movie_count,
+        "bytes": byte_count,
+        "seconds": elapsed,
+        "rows_per_second": rows_this_run / elapsed if elapsed > 0 else 0.0,
+        "megabytes_per_second": byte_count / 2 ** 20 / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move the movies of a data.json file into the SQL database.")
+    parser.add_argument("path", help="JSON file to migrate")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="rows per executemany() batch (default: 1000)")
+    parser.add_argument("--checkpoint", type=int, default=100000,
+                        help="rows per committed transaction (default: 100000)")
+    parser.add_argument("--restart", action="store_true",
+                        help="start from the beginning even if an earlier run was interrupted")
+    args = parser.parse_args(argv)
+
+    try:
+        report = migrate_json(args.path, args.batch_size, args.checkpoint, args.restart)
+    except KeyboardInterrupt:
+        print("Interrupted. Run the same command again to continue after the last checkpoint.")
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error migrating '{args.path}': {e}")
+        return 1
+
+    print(f"Migrated {report['rows']} movies ({report['total_rows']} in total) in {report['seconds']:.2f}s "
+          f"({report['rows_per_second']:.0f} rows/s, {report['megabytes_per_second']:.1f} MB/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+from sqlalchemy import text
+
+# Ordered schema migrations: (version, description, statements).
+# Never edit a migration that has been released, append a new one instead.
+MIGRATIONS = [
+    (1, "create movies table", [
+        """
+        CREATE TABLE IF NOT EXISTS movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT UNIQUE NOT NULL,
+            year INTEGER NOT NULL,
+            rating REAL NOT NULL,
+            poster_url TEXT
+        )
+        """,
+    ]),
+    (2, "add indexes for sorting and range filters", [
+        "CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_year_rating ON movies (year, rating)",
+        "CREATE INDEX IF NOT EXISTS idx_movies_title_nocase ON movies (title COLLATE NOCASE)",
+        "ANALYZE movies",
+    ]),
+    (3, "add OMDb response cache", [
+        """
+        CREATE TABLE IF NOT EXISTS omdb_cache (
+            title_key TEXT PRIMARY KEY,
+            movie_json TEXT,
+            expires_at REAL NOT NULL
+        )
+        """,
+    ]),
+    (4, "track revisions of movies", [
+        "ALTER TABLE movies ADD COLUMN revision INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE movies ADD COLUMN updated_at TEXT",
+        # Single row counter, bumped by every change to the movies table
+        """
+        CREATE TABLE IF NOT EXISTS catalog_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO catalog_revision (id, revision) VALUES (1, 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_revision_after_insert
+        AFTER INSERT ON movies
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1 WHERE id = 1;
+            UPDATE movies
+            SET revision = (SELECT revision FROM catalog_revision WHERE id = 1),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_revision_after_update
+        AFTER UPDATE OF title, year, rating, poster_url ON movies
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1 WHERE id = 1;
+            UPDATE movies
+            SET revision = (SELECT revision FROM catalog_revision WHERE id = 1),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_revision_after_delete
+        AFTER DELETE ON movies
+        BEGIN
+            UPDATE catalog_revision SET revision = revision + 1 WHERE id = 1;
+        END
+        """,
+    ]),
+    (5, "add full-text search indexes on titles", [
+        # Word and prefix search
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+            title, content='movies', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        # Substring search and typo-tolerant suggestions
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS movies_trigram USING fts5(
+            title, content='movies', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_search_after_insert
+        AFTER INSERT ON movies
+        BEGIN
+            INSERT INTO movies_fts (rowid, title) VALUES (NEW.id, NEW.title);
+            INSERT INTO movies_trigram (rowid, title) VALUES (NEW.id, NEW.title);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_search_after_delete
+        AFTER DELETE ON movies
+        BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+            INSERT INTO movies_trigram (movies_trigram, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_search_after_update
+        AFTER UPDATE OF title ON movies
+        BEGIN
+            INSERT INTO movies_fts (movies_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+            INSERT INTO movies_trigram (movies_trigram, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+            INSERT INTO movies_fts (rowid, title) VALUES (NEW.id, NEW.title);
+            INSERT INTO movies_trigram (rowid, title) VALUES (NEW.id, NEW.title);
+        END
+        """,
+        # Index the movies that already exist
+        "INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')",
+        "INSERT INTO movies_trigram (movies_trigram) VALUES ('rebuild')",
+    ]),
+    (6, "add incrementally maintained rating statistics", [
+        """
+        CREATE TABLE IF NOT EXISTS movie_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            movie_count INTEGER NOT NULL,
+            rating_sum REAL NOT NULL
+        )
+        """,
+        # Bucket n counts the ratings n <= rating < n + 1 (10.0 goes into bucket 9)
+        """
+        CREATE TABLE IF NOT EXISTS rating_histogram (
+            bucket INTEGER PRIMARY KEY,
+            movie_count INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR REPLACE INTO movie_stats (id, movie_count, rating_sum)
+        SELECT 1, COUNT(*), COALESCE(SUM(rating), 0) FROM movies
+        """,
+        """
+        WITH RECURSIVE buckets(bucket) AS (SELECT 0 UNION ALL SELECT bucket + 1 FROM buckets WHERE bucket < 9)
+        INSERT OR REPLACE INTO rating_histogram (bucket, movie_count)
+        SELECT bucket, (SELECT COUNT(*) FROM movies WHERE MIN(MAX(CAST(movies.rating AS INTEGER), 0), 9) = bucket)
+        FROM buckets
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_stats_after_insert
+        AFTER INSERT ON movies
+        BEGIN
+            UPDATE movie_stats SET movie_count = movie_count + 1, rating_sum = rating_sum + NEW.rating
+            WHERE id = 1;
+            UPDATE rating_histogram SET movie_count = movie_count + 1
+            WHERE bucket = MIN(MAX(CAST(NEW.rating AS INTEGER), 0), 9);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_stats_after_delete
+        AFTER DELETE ON movies
+        BEGIN
+            UPDATE movie_stats SET movie_count = movie_count - 1, rating_sum = rating_sum - OLD.rating
+            WHERE id = 1;
+            UPDATE rating_histogram SET movie_count = movie_count - 1
+            WHERE bucket = MIN(MAX(CAST(OLD.rating AS INTEGER), 0), 9);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS movies_stats_after_update
+        AFTER UPDATE OF rating ON movies
+        BEGIN
+            UPDATE movie_stats SET rating_sum = rating_sum - OLD.rating + NEW.rating
+            WHERE id = 1;
+            UPDATE rating_histogram SET movie_count = movie_count - 1
+            WHERE bucket = MIN(MAX(CAST(OLD.rating AS INTEGER), 0), 9);
+            UPDATE rating_histogram SET movie_count = movie_count + 1
+            WHERE bucket = MIN(MAX(CAST(NEW.rating AS INTEGER), 0), 9);
+        END
+        """,
+    ]),
+    (7, "track resumable JSON imports", [
+        """
+        CREATE TABLE IF NOT EXISTS json_import_progress (
+            source TEXT PRIMARY KEY,
+            file_size INTEGER NOT NULL,
+            modified_ns INTEGER NOT NULL,
+            byte_offset INTEGER NOT NULL,
+            movie_count INTEGER NOT NULL
+        )
+        """,
+    ]),
+]
+
+
+def get_schema_version(connection):
+    """Return the version of the newest migration applied to the database (0 if none)."""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    version = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+def migrate(connection):
+    """Apply all pending migrations in order, each one in its own
+    transaction, so existing databases are upgraded in place and a failing
+    migration leaves no partial changes behind."""
+    current_version = get_schema_version(connection)
+    connection.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current_version:
+            continue
+        # pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so
+        # without an explicit BEGIN every DDL statement commits on its own
+        connection.exec_driver_sql("BEGIN")
+        try:
+            for statement in statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                {"version": version, "description": description}
+            )
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
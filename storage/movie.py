@@ -0,0 +1,28 @@
+from array import array
+from typing import NamedTuple, Optional
+
+
+class Movie(NamedTuple):
+    """One movie as returned by the storage functions.
+    A tuple subclass: no per-row dict, fields are read as movie.title etc."""
+    title: str
+    year: int
+    rating: float
+    poster_url: Optional[str] = None
+
+
+class MovieColumns(NamedTuple):
+    """Movies stored column by column, for analytics over many rows:
+    a list of titles and typed arrays of years and ratings (same order)."""
+    titles: list
+    years: array
+    ratings: array
+
+
+class MoviePage(NamedTuple):
+    """One page of movies in id order. first_id and last_id are the ids of
+    the first and last movie, used to fetch the neighbouring pages
+    (None for an empty page)."""
+    movies: list
+    first_id: Optional[int]
+    last_id: Optional[int]
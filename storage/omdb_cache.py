@@ -0,0 +1,154 @@
+"""Cache for OMDb lookups.
+
+Responses are kept in the omdb_cache table of the movies database, keyed
+by the normalized title, with an in-memory LRU layer in front of it.
+Titles OMDb did not find are cached too (as NULL), with a shorter TTL, so
+typos don't use up the API quota.
+"""
+from collections import OrderedDict
+import json
+import threading
+import time
+
+from sqlalchemy import text
+
+from . import T4W4movie_storage_sql as storage
+
+POSITIVE_TTL = 7 * 24 * 60 * 60  # seconds
+NEGATIVE_TTL = 24 * 60 * 60
+MEMORY_SIZE = 1024
+
+# Returned by lookup() when the title is not cached (None means "cached as not found")
+MISS = object()
+
+
+def normalize_title(title):
+    """Cache key for a title: lower case with collapsed whitespace."""
+    return " ".join(title.lower().split())
+
+
+class OmdbCache:
+    """Two-level (memory LRU + SQLite) cache of parsed OMDb movie dicts."""
+
+    MISS = MISS
+
+    def __init__(self, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL,
+                 memory_size=MEMORY_SIZE):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # title_key -> (expires_at, movie or None)
+        self.lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "network_fetches": 0,
+            "network_seconds": 0.0
+        }
+
+    def _remember(self, key, expires_at, movie):
+        with self.lock:
+            self.memory[key] = (expires_at, movie)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def _count_hit(self, counter, movie):
+        with self.lock:
+            self.counters[counter] += 1
+            if movie is None:
+                self.counters["negative_hits"] += 1
+
+    def lookup(self, title):
+        """Return the cached movie dict, None for a cached "not found",
+        or MISS if the title is not cached or has expired."""
+        key = normalize_title(title)
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.memory.move_to_end(key)
+                else:
+                    del self.memory[key]
+                    entry = None
+        if entry is not None:
+            self._count_hit("memory_hits", entry[1])
+            return entry[1]
+
+        with storage.get_engine().connect() as connection:
+            row = connection.execute(
+                text("SELECT movie_json, expires_at FROM omdb_cache WHERE title_key = :key"),
+                {"key": key}
+            ).fetchone()
+
+        if row is None or row[1] <= now:
+            with self.lock:
+                self.counters["misses"] += 1
+            return MISS
+
+        movie = json.loads(row[0]) if row[0] is not None else None
+        self._remember(key, row[1], movie)
+        self._count_hit("disk_hits", movie)
+        return movie
+
+    def store(self, title, movie, fetch_seconds=None):
+        """Cache a parsed OMDb result (None for "not found").
+        fetch_seconds is the network time the lookup took, used for stats()."""
+        key = normalize_title(title)
+        ttl = self.positive_ttl if movie is not None else self.negative_ttl
+        expires_at = time.time() + ttl
+
+        with storage.get_engine().connect() as connection:
+            connection.execute(
+                text("""
+                    INSERT INTO omdb_cache (title_key, movie_json, expires_at)
+                    VALUES (:key, :movie_json, :expires_at)
+                    ON CONFLICT(title_key) DO UPDATE SET
+                        movie_json = excluded.movie_json,
+                        expires_at = excluded.expires_at
+                """),
+                {
+                    "key": key,
+                    "movie_json": json.dumps(movie) if movie is not None else None,
+                    "expires_at": expires_at
+                }
+            )
+            connection.commit()
+
+        self._remember(key, expires_at, movie)
+        if fetch_seconds is not None:
+            with self.lock:
+                self.counters["network_fetches"] += 1
+                self.counters["network_seconds"] += fetch_seconds
+
+    def clear(self, expired_only=False):
+        """Remove cached entries (only the expired ones if expired_only is True)."""
+        with storage.get_engine().connect() as connection:
+            if expired_only:
+                connection.execute(text("DELETE FROM omdb_cache WHERE expires_at <= :now"),
+                                   {"now": time.time()})
+            else:
+                connection.execute(text("DELETE FROM omdb_cache"))
+            connection.commit()
+        with self.lock:
+            self.memory.clear()
+
+    def stats(self):
+        """Return the hit/miss counters plus the estimated network time saved."""
+        with self.lock:
+            stats = dict(self.counters)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        average_fetch = (stats["network_seconds"] / stats["network_fetches"]
+                         if stats["network_fetches"] else 0.0)
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["seconds_saved"] = hits * average_fetch
+        return stats
+
+
+# Shared cache used by the CLI
+cache = OmdbCache()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Let the tests import the top-level modules (storage, website_generator, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import T4W4movie_storage_sql as storage  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """An empty, fully migrated SQLite database for one test."""
+    engine = storage.init_db(f"sqlite:///{tmp_path / 'movies.db'}")
+    yield engine
+    engine.dispose()
+    if storage.engine is not None:  # the test switched to another database
+        storage.engine.dispose()
+    storage.engine = None
@@ -0,0 +1,38 @@
+import numpy as np
+from sqlalchemy import event, text
+
+import analytics
+from storage import T4W4movie_storage_sql as storage
+
+
+def test_load_arrays(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 1990 + number, "rating": number}
+                            for number in range(10))
+    years, ratings = analytics.load_arrays(min_rating=5)
+    assert years.tolist() == list(range(1995, 2000))
+    assert ratings.tolist() == [5.0, 6.0, 7.0, 8.0, 9.0]
+    assert analytics.summarize(*analytics.load_arrays())["count"] == 10
+
+
+def test_load_arrays_reads_one_snapshot(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 2000, "rating": 5.0}
+                            for number in range(10))
+    deleted = []
+
+    def delete_between_count_and_rows(connection, cursor, statement, parameters, context, executemany):
+        # Another connection commits a delete after the count has been read
+        if statement.startswith("SELECT year, rating") and not deleted:
+            with database.begin() as other_connection:
+                other_connection.execute(text("DELETE FROM movies WHERE title = 'Movie 3'"))
+            deleted.append(True)
+
+    event.listen(database, "before_cursor_execute", delete_between_count_and_rows)
+    try:
+        years, ratings = analytics.load_arrays()
+    finally:
+        event.remove(database, "before_cursor_execute", delete_between_count_and_rows)
+
+    assert deleted
+    assert len(ratings) == 10  # the snapshot from before the delete
+    assert np.all(years == 2000)
+    assert storage.count_movies() == 9
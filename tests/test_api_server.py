@@ -0,0 +1,66 @@
+import http.client
+import json
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import api_server
+from storage import T4W4movie_storage_sql as storage
+
+
+@pytest.fixture
+def client(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 2000, "rating": 7.0}
+                            for number in range(30))
+    server = api_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    yield connection
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def request(connection, path, headers=None):
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, response.getheader("ETag"), json.loads(body) if body else None
+
+
+@pytest.mark.parametrize("path", ["/movies?limit=-1", "/movies?limit=0", "/movies/search?q=movie&limit=-1"])
+def test_limit_below_one_is_rejected(client, path):
+    status, _, body = request(client, path)
+    assert status == 400
+    assert "limit" in body["error"]
+
+
+def test_limit_is_capped(client, monkeypatch):
+    monkeypatch.setattr(api_server, "MAX_PAGE_SIZE", 10)
+    status, _, body = request(client, "/movies?limit=100")
+    assert status == 200
+    assert len(body["movies"]) == 10
+
+
+def test_revalidation(client):
+    status, etag, _ = request(client, "/movies")
+    assert status == 200
+    assert request(client, "/movies", {"If-None-Match": etag})[0] == 304
+    assert request(client, "/movies/Movie 1".replace(" ", "%20"), {"If-None-Match": etag})[0] == 304
+    # Unknown paths and titles are not found, whatever the client's ETag
+    assert request(client, "/movies/nope", {"If-None-Match": etag})[0] == 404
+    assert request(client, "/nope", {"If-None-Match": etag})[0] == 404
+    assert request(client, "/movies?limit=x", {"If-None-Match": etag})[0] == 400
+
+
+def test_storage_errors_return_500(client, monkeypatch):
+    def locked(*args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(storage, "list_movies_page", locked)
+    status, _, body = request(client, "/movies")
+    assert status == 500
+    assert body == {"error": "Internal server error."}
+    # The keep-alive connection is still usable
+    assert request(client, "/stats")[0] == 200
@@ -0,0 +1,43 @@
+import os
+import stat
+
+import pytest
+
+from storage.atomic_file import atomic_write
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_replaces_the_file_and_keeps_its_mode(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    with atomic_write(str(path), text=True, fsync=True) as f:
+        f.write("new")
+    assert path.read_text() == "new"
+    assert mode(path) == 0o640
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_new_file_gets_the_umask_mode(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        with atomic_write(str(tmp_path / "poster.jpg")) as f:
+            f.write(b"\xff\xd8")
+        assert os.umask(0o027) == 0o027  # the umask was not changed meanwhile
+    finally:
+        os.umask(old_umask)
+    assert mode(tmp_path / "poster.jpg") == 0o640
+
+
+def test_error_keeps_the_old_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("old")
+    with pytest.raises(ValueError):
+        with atomic_write(str(path), text=True) as f:
+            f.write("half")
+            raise ValueError("disk full")
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
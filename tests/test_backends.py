@@ -0,0 +1,106 @@
+import pytest
+
+from storage import T4W4movie_storage_sql as storage
+from storage import backends
+from storage.movie import Movie
+
+SCENARIO_MOVIES = [
+    ("The Godfather", 1972, 9.2, None),
+    ("The Godfather: Part II", 1974, 9.0, "http://example.com/godfather2.jpg"),
+    ("Pulp Fiction", 1994, 8.9, None),
+    ("The Room", 2003, 3.6, None),
+    ("Forrest Gump", 1994, 8.8, None),
+    ("The Dark Knight", 2008, 9.0, None),
+    ("12 Angry Men", 1957, 9.0, None),
+]
+
+
+@pytest.fixture(params=["sql", "json", "memory"])
+def store(request, tmp_path):
+    """A fresh, empty store of every backend."""
+    if request.param == "sql":
+        request.getfixturevalue("database")
+        yield backends.SqlStorage()
+    elif request.param == "json":
+        json_store = backends.JsonStorage(str(tmp_path / "data.json"))
+        yield json_store
+        json_store.close()
+    else:
+        yield backends.MemoryStorage()
+
+
+def run_scenario(store):
+    """Return the answers of store to a fixed sequence of calls, as
+    (description, answer) pairs. Unordered answers are sorted."""
+    answers = []
+    for movie in SCENARIO_MOVIES:
+        answers.append((f"add {movie[0]}", store.add_movie(*movie)))
+    answers.append(("add duplicate", store.add_movie("Pulp Fiction", 1994, 1.0)))
+    answers.append(("count", store.count_movies()))
+    answers.append(("get", store.get_movie("The Godfather: Part II")))
+    answers.append(("get missing", store.get_movie("the godfather")))
+    answers.append(("update", store.update_movie("The Room", 4.1, 2003)))
+    answers.append(("update missing", store.update_movie("Nope", 1.0, 2000)))
+    answers.append(("delete", store.delete_movie("Forrest Gump")))
+    answers.append(("delete missing", store.delete_movie("Forrest Gump")))
+    answers.append(("re-add", store.add_movie("Forrest Gump", 1994, 8.8)))
+    answers.append(("list", sorted(store.list_movies())))
+    for order_by in ("title", "year", "rating"):
+        for descending in (False, True):
+            answers.append((f"sorted by {order_by} descending={descending}",
+                            store.find_movies(order_by=order_by, descending=descending)))
+    answers.append(("filter", sorted(store.find_movies(min_rating=8.9, year_range=(1960, None)))))
+    answers.append(("filter title", store.find_movies(title_contains="GODFATHER", order_by="year")))
+    answers.append(("limit", store.find_movies(order_by="rating", descending=True, limit=3)))
+    answers.append(("search", sorted(store.search_movies("the"))))
+    answers.append(("search words", sorted(store.search_movies("dark kni"))))
+    answers.append(("search nothing", store.search_movies("zzz")))
+    answers.append(("stats", store.get_rating_stats()))
+    answers.append(("random", store.random_movie() in store.list_movies()))
+    return answers
+
+
+def test_backend_conforms(store):
+    expected = dict(run_scenario(backends.MemoryStorage()))
+    for description, answer in run_scenario(store):
+        assert answer == expected[description], description
+
+
+def test_scenario_answers():
+    answers = dict(run_scenario(backends.MemoryStorage()))
+    assert answers["add duplicate"] is False
+    assert answers["count"] == 7
+    assert answers["get"] == Movie(*SCENARIO_MOVIES[1])
+    assert answers["get missing"] is None
+    assert (answers["update missing"], answers["delete missing"]) == (False, False)
+    # Ties are broken by the order the movies were added, newest first (like ORDER BY rating, id DESC)
+    assert [movie.title for movie in answers["limit"]] == ["The Godfather", "12 Angry Men", "The Dark Knight"]
+    assert [movie.title for movie in answers["filter title"]] == ["The Godfather", "The Godfather: Part II"]
+    assert answers["stats"]["count"] == 7
+    assert answers["stats"]["best_titles"] == ["The Godfather"]
+    assert answers["stats"]["worst_titles"] == ["The Room"]
+    assert answers["random"] is True
+
+
+def test_json_changes_survive_reopening(tmp_path):
+    path = str(tmp_path / "data.json")
+    json_store = backends.JsonStorage(path)
+    run_scenario(json_store)
+    movies = sorted(json_store.list_movies())
+    json_store.close()
+    assert sorted(backends.JsonStorage(path).list_movies()) == movies
+
+
+def test_sql_storage_keeps_the_current_engine(database):
+    storage.add_movie("Alien", 1979, 8.5, None)
+    store = backends.get_storage("sql")
+    assert storage.engine is database
+    assert store.get_movie("Alien").year == 1979
+    assert store.add_movie("Heat", 1995, 8.3)
+    assert storage.get_movie("Heat") is not None
+
+
+def test_sql_storage_with_a_url_switches_the_database(database, tmp_path):
+    store = backends.SqlStorage(f"sqlite:///{tmp_path / 'other.db'}")
+    assert storage.engine is not database
+    assert store.count_movies() == 0
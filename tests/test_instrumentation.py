@@ -0,0 +1,40 @@
+import time
+
+import instrumentation
+
+
+def test_untimed_blocks_are_left_out():
+    registry = instrumentation.Registry()
+    with registry.time("outer"):
+        with registry.time("inner"):
+            time.sleep(0.01)
+            with instrumentation.untimed():
+                time.sleep(0.2)
+        time.sleep(0.01)
+
+    summary = registry.snapshot()
+    assert 0.01 <= summary["inner"][""]["max"] < 0.1
+    assert 0.02 <= summary["outer"][""]["max"] < 0.15
+
+
+def test_run_command_leaves_out_waiting_for_input(monkeypatch):
+    monkeypatch.setattr(instrumentation, "registry", instrumentation.Registry())
+
+    def action():
+        with instrumentation.untimed():
+            time.sleep(0.2)  # the user typing
+        return "done"
+
+    assert instrumentation.run_command("menu_action_seconds", "action", action) == "done"
+    timing = instrumentation.registry.snapshot()["menu_action_seconds"]["action"]
+    assert timing["count"] == 1
+    assert timing["max"] < 0.1
+
+
+def test_prometheus_text():
+    registry = instrumentation.Registry()
+    registry.observe("cli_command_seconds", 'say "hi"', 0.5)
+    text = registry.to_prometheus()
+    assert "# TYPE movies_cli_command_seconds summary" in text
+    assert 'movies_cli_command_seconds{command="say \\"hi\\"",quantile="0.5"} 0.5' in text
+    assert 'movies_cli_command_seconds_count{command="say \\"hi\\""} 1' in text
@@ -0,0 +1,47 @@
+import json
+import os
+import stat
+
+from storage.json_file import JsonMovieFile
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_changes_survive_reopening(tmp_path):
+    path = str(tmp_path / "data.json")
+    movie_file = JsonMovieFile(path)
+    movie_file.set("Up", {"rating": 8.3, "year_of_release": 2009})
+    movie_file.set("Heat", {"rating": 8.3, "year_of_release": 1995})
+    movie_file.delete("Heat")
+    movie_file.close()
+
+    assert JsonMovieFile(path).movies == {"Up": {"rating": 8.3, "year_of_release": 2009}}
+    with open(path) as f:
+        assert json.load(f) == {"movies": {"Up": {"rating": 8.3, "year_of_release": 2009}}}
+
+
+def test_compaction_keeps_the_file_mode(tmp_path):
+    path = str(tmp_path / "data.json")
+    with open(path, "w") as f:
+        json.dump({"movies": {}}, f)
+    os.chmod(path, 0o640)
+
+    movie_file = JsonMovieFile(path, compact_every=1)
+    movie_file.set("Up", {"rating": 8.3, "year_of_release": 2009})
+    movie_file.compact()
+    movie_file.close()
+    assert mode(path) == 0o640
+
+
+def test_new_file_gets_the_umask_mode(tmp_path):
+    old_umask = os.umask(0o022)
+    try:
+        path = str(tmp_path / "data.json")
+        movie_file = JsonMovieFile(path, journal=False)
+        movie_file.set("Up", {"rating": 8.3, "year_of_release": 2009})
+        movie_file.close()
+    finally:
+        os.umask(old_umask)
+    assert mode(path) == 0o644
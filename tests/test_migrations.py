@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from storage import T4W4movie_storage_sql as storage
+from storage import migrations
+
+
+def query_plan(run_query):
+    """Run the storage call and return the EXPLAIN QUERY PLAN details of
+    the SELECT statement it executed."""
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = storage.get_engine()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run_query()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def movies(database):
+    storage.bulk_add_movies(
+        {"title": f"Movie {number}", "year": 1950 + number % 70,
+         "rating": 1 + number % 90 / 10, "poster_url": None}
+        for number in range(2000)
+    )
+    with database.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def test_sorting_by_rating_uses_the_rating_index(movies):
+    plan = query_plan(lambda: storage.find_movies(order_by="rating", descending=True, limit=10))
+    assert "idx_movies_rating" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_year_range_uses_the_year_index(movies):
+    plan = query_plan(lambda: storage.find_movies(year_range=(1990, 1991)))
+    assert "idx_movies_year" in plan
+
+
+def test_all_migrations_are_recorded(database):
+    with database.connect() as connection:
+        assert migrations.get_schema_version(connection) == migrations.MIGRATIONS[-1][0]
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'movies.db'}"
+    broken = [
+        (version, description, statements[:1] + ["SELECT * FROM no_such_table"])
+        if version == 4 else (version, description, statements)
+        for version, description, statements in migrations.MIGRATIONS
+    ]
+    monkeypatch.setattr(migrations, "MIGRATIONS", broken)
+    with pytest.raises(OperationalError):
+        storage.init_db(db_url)
+
+    # The ALTER TABLE of the failed migration was rolled back, so it runs again
+    monkeypatch.undo()
+    engine = storage.init_db(db_url)
+    try:
+        with engine.connect() as connection:
+            assert migrations.get_schema_version(connection) == migrations.MIGRATIONS[-1][0]
+            columns = [row[1] for row in connection.execute(text("PRAGMA table_info(movies)"))]
+            assert columns.count("revision") == 1
+    finally:
+        engine.dispose()
+        storage.engine = None
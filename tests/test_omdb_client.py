@@ -0,0 +1,59 @@
+import time
+
+import omdb_client
+from benchmarks.bench_omdb import make_answer, start_server
+
+
+def test_fetch_movies_parses_found_and_not_found_titles():
+    movies = {
+        "Alien": make_answer("Alien", 29),
+        "Twin Peaks": {"Title": "Twin Peaks", "Year": "1990–1991", "imdbRating": "N/A",
+                       "Poster": "N/A", "Response": "True"},
+    }
+    server, base_url, requests_served = start_server(movies)
+    try:
+        results = omdb_client.fetch_movies(["Alien", "Nope", "Twin Peaks", "Alien"], "test-key",
+                                           max_workers=4, base_url=base_url)
+    finally:
+        server.shutdown()
+
+    assert list(results) == ["Alien", "Nope", "Twin Peaks"]
+    assert results["Alien"] == {"title": "Alien", "year": 1979, "rating": 3.9,
+                                "poster_url": "https://img.example.com/posters/29.jpg"}
+    assert results["Nope"] is None
+    assert results["Twin Peaks"]["year"] == 1990
+    assert results["Twin Peaks"]["rating"] == 0.0
+    # The duplicate title is requested once
+    assert sorted(title for _, title in requests_served) == ["Alien", "Nope", "Twin Peaks"]
+
+
+def test_failed_requests_return_none():
+    server, base_url, _ = start_server({})
+    server.shutdown()
+    server.server_close()
+    results = omdb_client.fetch_movies(["Alien"], "test-key", base_url=base_url)
+    assert results == {"Alien": None}
+
+
+def test_fetch_movies_respects_the_request_rate():
+    rate = 50
+    titles = [f"Movie {number}" for number in range(rate + 25)]
+    server, base_url, requests_served = start_server({})
+    try:
+        start_time = time.monotonic()
+        omdb_client.fetch_movies(titles, "test-key", max_workers=8, requests_per_second=rate,
+                                 base_url=base_url)
+        seconds = time.monotonic() - start_time
+    finally:
+        server.shutdown()
+
+    assert len(requests_served) == len(titles)
+    # A burst of `rate` requests, then one request every 1 / rate seconds
+    assert seconds >= (len(titles) - rate) / rate * 0.9
+    # No window of d seconds holds more than the burst plus rate * d requests
+    # (give or take two for the time between acquiring a token and the request)
+    request_times = sorted(request_time for request_time, _ in requests_served)
+    for first in range(len(request_times)):
+        for last in range(first, len(request_times)):
+            window = request_times[last] - request_times[first]
+            assert last - first + 1 <= rate + rate * window + 2
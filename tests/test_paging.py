@@ -0,0 +1,84 @@
+import tracemalloc
+
+import pytest
+from sqlalchemy import text
+
+from storage import T4W4movie_storage_sql as storage
+from storage.movie import MoviePage
+
+
+def add_movies(first, last):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 1900 + number % 125,
+                             "rating": number % 100 / 10, "poster_url": None}
+                            for number in range(first, last))
+
+
+def peak_memory(listing):
+    """Peak bytes allocated while iterating over listing()."""
+    tracemalloc.start()
+    for _ in listing():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_keyset_iteration_memory_stays_flat(database):
+    def keyset_pages():
+        return storage.iter_movies_keyset(page_size=200)
+
+    add_movies(0, 2000)
+    peak_memory(keyset_pages)  # warm up SQLAlchemy's statement caches
+    small = peak_memory(keyset_pages)
+    add_movies(2000, 20000)
+    large = peak_memory(keyset_pages)
+    everything = peak_memory(storage.list_movies)
+
+    assert sum(1 for _ in storage.iter_movies_keyset(page_size=200)) == 20000
+    assert large < small * 1.5
+    assert large < everything / 5
+
+
+@pytest.fixture
+def movies(database):
+    add_movies(0, 25)
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM movies WHERE id IN (3, 11, 12)"))
+
+
+def titles(page):
+    return [movie.title for movie in page.movies]
+
+
+def test_next_and_previous_pages(movies):
+    first = storage.list_movies_page(5)
+    assert titles(first) == ["Movie 0", "Movie 1", "Movie 3", "Movie 4", "Movie 5"]
+    second = storage.list_movies_page(5, after_id=first.last_id)
+    assert titles(second) == ["Movie 6", "Movie 7", "Movie 8", "Movie 9", "Movie 12"]
+    assert storage.list_movies_page(5, before_id=second.first_id) == first
+
+    # Walk to the end and back again
+    pages = [first]
+    while pages[-1].movies:
+        pages.append(storage.list_movies_page(5, after_id=pages[-1].last_id))
+    assert sum(len(page.movies) for page in pages) == 22
+    assert pages[-1] == MoviePage(movies=[], first_id=None, last_id=None)
+    assert storage.list_movies_page(5, before_id=pages[-2].first_id) == pages[-3]
+
+
+def test_offset_pages(movies):
+    assert titles(storage.list_movies_page(5, offset=5)) == titles(
+        storage.list_movies_page(5, after_id=storage.list_movies_page(5).last_id))
+    assert len(storage.list_movies_page(5, offset=20).movies) == 2
+
+
+def test_filtered_pages(movies):
+    page = storage.list_movies_page(3, filters={"min_rating": 1.5})
+    assert titles(page) == ["Movie 15", "Movie 16", "Movie 17"]
+    page = storage.list_movies_page(3, after_id=page.last_id, filters={"min_rating": 1.5})
+    assert titles(page) == ["Movie 18", "Movie 19", "Movie 20"]
+
+
+def test_keyset_iteration_yields_every_movie_once(movies):
+    assert [movie.title for movie in storage.iter_movies_keyset(page_size=4)] == \
+        [movie.title for movie in storage.iter_movies()]
@@ -0,0 +1,35 @@
+import os
+import stat
+
+import pytest
+
+import poster_cache
+from benchmarks.bench_posters import make_poster, start_server
+
+
+@pytest.fixture
+def poster_urls():
+    pytest.importorskip("PIL")
+    images = [make_poster(0), make_poster(1), make_poster(0)]
+    server, _ = start_server(images, latency=0)
+    yield [f"http://127.0.0.1:{server.server_port}/poster/{number}.jpg" for number in range(3)]
+    server.shutdown()
+    server.server_close()
+
+
+def test_cache_posters(poster_urls, tmp_path):
+    old_umask = os.umask(0o022)
+    try:
+        posters = poster_cache.cache_posters(poster_urls + [None, "N/A"], output_dir=str(tmp_path),
+                                             max_workers=2)
+    finally:
+        os.umask(old_umask)
+    assert sorted(posters) == poster_urls
+    # The same image behind two URLs is stored once
+    assert posters[poster_urls[0]] == posters[poster_urls[2]]
+    assert len(set(posters.values())) == 2
+
+    poster_dir = tmp_path / poster_cache.POSTER_DIR
+    # Readable by a web server running as another user
+    for name in os.listdir(poster_dir):
+        assert stat.S_IMODE(os.stat(poster_dir / name).st_mode) == 0o644, name
@@ -0,0 +1,81 @@
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy import event, text
+
+from storage import T4W4movie_storage_sql as storage
+
+# 99% critical value of chi-square with 19 degrees of freedom
+CHI_SQUARE_99 = 36.19
+
+
+@pytest.fixture
+def movies(database):
+    """20 movies with gaps in their ids."""
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 2000, "rating": 2.0 if number % 2 else 8.0}
+                            for number in range(30))
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM movies WHERE id % 3 = 0"))
+
+
+def chi_square(counts, expected):
+    return sum((count - expected) ** 2 / expected for count in counts)
+
+
+def test_picks_are_uniform(movies):
+    rng = random.Random(1)
+    counts = Counter(storage.random_movies(1, rng=rng)[0].title for _ in range(10000))
+    assert len(counts) == 20
+    assert chi_square(counts.values(), 10000 / 20) < CHI_SQUARE_99
+
+
+def test_offset_fallback_is_uniform(movies, monkeypatch):
+    # With a single id probe about a third of the picks (the gaps) come from the OFFSET fallback
+    monkeypatch.setattr(storage, "MAX_RANDOM_PROBES", 1)
+    rng = random.Random(2)
+    counts = Counter(movie.title for _ in range(5000) for movie in storage.random_movies(1, rng=rng))
+    assert len(counts) == 20
+    assert chi_square(counts.values(), sum(counts.values()) / 20) < CHI_SQUARE_99
+
+
+def test_weighted_picks_follow_the_rating(movies):
+    rng = random.Random(3)
+    picks = [storage.random_movies(1, weighted=True, rng=rng)[0] for _ in range(5000)]
+    # Ten movies rated 8 and ten rated 2: 80% of the picks should be rated 8
+    share = sum(movie.rating == 8.0 for movie in picks) / len(picks)
+    assert share == pytest.approx(0.8, abs=0.02)
+
+
+def test_k_distinct_picks(movies):
+    rng = random.Random(4)
+    for k in (1, 5, 19, 20):
+        picks = storage.random_movies(k, rng=rng)
+        assert len(picks) == k
+        assert len({movie.title for movie in picks}) == k
+    assert len(storage.random_movies(50, rng=rng)) == 20
+    high = storage.random_movies(50, filters={"min_rating": 5}, rng=rng)
+    assert len(high) == 10
+    assert all(movie.rating == 8.0 for movie in high)
+    assert storage.random_movies(3, filters={"min_rating": 9}, rng=rng) == []
+
+
+def test_concurrent_delete_during_offset_fallback(movies, monkeypatch, database):
+    monkeypatch.setattr(storage, "MAX_RANDOM_PROBES", 1)
+    deleted = []
+
+    def delete_after_count(connection, cursor, statement, parameters, context, executemany):
+        # Another connection deletes most movies after they were counted
+        if "OFFSET" in statement and not deleted:
+            with database.begin() as other_connection:
+                other_connection.execute(text("DELETE FROM movies WHERE id > 5"))
+            deleted.append(True)
+
+    event.listen(database, "before_cursor_execute", delete_after_count)
+    try:
+        picks = storage.random_movies(10, filters={"min_rating": 1}, rng=random.Random(5))
+    finally:
+        event.remove(database, "before_cursor_execute", delete_after_count)
+
+    assert deleted
+    assert len({movie.title for movie in picks}) == len(picks)
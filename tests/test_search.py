@@ -0,0 +1,56 @@
+import pytest
+
+from storage import T4W4movie_storage_sql as storage
+
+TITLES = ["Alien", "Aliens", "Heat", "The Dark Knight", "The Dark Knight Rises", "Up",
+          "Spirited Away", "Amélie", "100% Wolf", "Hot_Shots"]
+
+
+@pytest.fixture
+def movies(database):
+    # Many unrelated titles around the ones the tests look for
+    filler = ({"title": f"Holiday Special {number}", "year": 2000, "rating": 5.0} for number in range(300))
+    storage.bulk_add_movies(filler)
+    storage.bulk_add_movies({"title": title, "year": 2000, "rating": 7.0} for title in TITLES)
+
+
+def titles(movies):
+    return [movie.title for movie in movies]
+
+
+def test_search_finds_substrings(movies):
+    assert sorted(titles(storage.search_movies("ark kni"))) == ["The Dark Knight", "The Dark Knight Rises"]
+    assert sorted(titles(storage.search_movies("ALIEN"))) == ["Alien", "Aliens"]
+
+
+def test_search_falls_back_to_word_prefixes(movies):
+    assert titles(storage.search_movies("knight dark rises")) == ["The Dark Knight Rises"]
+    assert titles(storage.search_movies("spir aw")) == ["Spirited Away"]
+
+
+def test_search_short_strings_and_wildcards(movies):
+    assert titles(storage.search_movies("up")) == ["Up"]
+    assert titles(storage.search_movies("0%")) == ["100% Wolf"]
+    assert titles(storage.search_movies("t_s")) == ["Hot_Shots"]
+    assert storage.search_movies("   ") == []
+    assert storage.search_movies("zzz") == []
+
+
+def test_search_respects_the_limit(movies):
+    assert len(storage.search_movies("holiday", limit=7)) == 7
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("drak knigt", "The Dark Knight"),
+    ("alein", "Alien"),
+    ("haet", "Heat"),
+    ("amelie", "Amélie"),
+    ("al", "Alien"),
+])
+def test_suggestions(movies, typo, expected):
+    assert expected in titles(storage.suggest_movies(typo))
+
+
+def test_no_suggestions_for_unrelated_strings(movies):
+    assert storage.suggest_movies("xqzv") == []
+    assert storage.suggest_movies("") == []
@@ -0,0 +1,12 @@
+from benchmarks import bench_startup
+
+
+def test_cli_imports_within_budget():
+    # The best of three runs, so a busy machine doesn't fail the check
+    runs = [bench_startup.measure_imports() for _ in range(3)]
+    total, timings = min(runs)
+    assert total / 1000 <= bench_startup.BUDGET_MS
+
+    imported = {name.strip().split(".")[0] for _, name in timings}
+    for module in bench_startup.DEFERRED_MODULES:
+        assert module not in imported
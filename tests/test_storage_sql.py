@@ -0,0 +1,127 @@
+import random
+import threading
+from array import array
+
+import pytest
+from sqlalchemy import event, text
+
+from storage import T4W4movie_storage_sql as storage
+
+
+def test_concurrent_first_use_initializes_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_URL", f"sqlite:///{tmp_path / 'movies.db'}")
+    monkeypatch.setattr(storage, "engine", None)
+    barrier = threading.Barrier(8)
+    engines = []
+    errors = []
+
+    def first_use():
+        barrier.wait()
+        try:
+            engines.append(storage.get_engine())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({id(engine) for engine in engines}) == 1
+    assert storage.count_movies() == 0
+    storage.engine.dispose()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_maintained_stats_match_recomputation(database, seed, capsys):
+    rng = random.Random(seed)
+    titles = [f"Movie {number}" for number in range(150)]
+
+    def random_rating():
+        # Include the edges of the histogram buckets
+        return rng.choice([0.0, 1.0, 9.9, 10.0, round(rng.uniform(0, 10), 1)])
+
+    for _ in range(1000):
+        operation = rng.choices(("add", "update", "delete", "upsert", "session"), weights=(4, 3, 2, 1, 1))[0]
+        if operation == "add":
+            storage.add_movie(rng.choice(titles), rng.randint(1900, 2025), random_rating(), None)
+        elif operation == "update":
+            storage.update_movie(rng.choice(titles), random_rating(), rng.randint(1900, 2025))
+        elif operation == "delete":
+            storage.delete_movie(rng.choice(titles))
+        elif operation == "upsert":
+            storage.bulk_add_movies(
+                {"title": title, "year": 2000, "rating": random_rating()}
+                for title in rng.sample(titles, 10)
+            )
+        else:
+            with storage.session() as movie_session:
+                title = rng.choice(titles)
+                if movie_session.get(title) is None:
+                    movie_session.add(title, 2000, random_rating())
+                else:
+                    movie_session.delete(title)
+    capsys.readouterr()  # the module functions print
+
+    maintained, recomputed = storage.recompute_stats()
+    assert maintained["count"] == recomputed["count"]
+    assert maintained["histogram"] == recomputed["histogram"]
+    # The trigger-maintained sum is a float running total and drifts slightly
+    assert maintained["rating_sum"] == pytest.approx(recomputed["rating_sum"], abs=1e-9)
+
+    stats = storage.get_rating_stats()
+    if recomputed["count"]:
+        assert stats["count"] == recomputed["count"]
+        assert stats["average"] == pytest.approx(recomputed["rating_sum"] / recomputed["count"])
+    else:
+        assert stats is None
+
+
+def test_recompute_stats_repairs_the_maintained_values(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 2000, "rating": number / 2}
+                            for number in range(21))
+    with database.begin() as connection:
+        connection.execute(text("UPDATE movie_stats SET movie_count = 0, rating_sum = 0"))
+        connection.execute(text("UPDATE rating_histogram SET movie_count = 0"))
+
+    maintained, recomputed = storage.recompute_stats(repair=True)
+    assert maintained["count"] == 0
+    assert storage.recompute_stats()[0] == recomputed
+
+
+def test_rating_stats_read_one_snapshot(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 2000, "rating": number % 10}
+                            for number in range(10))
+    deleted = []
+
+    def delete_between_reads(connection, cursor, statement, parameters, context, executemany):
+        # Another connection deletes most movies after the count has been read
+        if statement.startswith("SELECT MIN(rating)") and not deleted:
+            with database.begin() as other_connection:
+                other_connection.execute(text("DELETE FROM movies WHERE rating < 8"))
+            deleted.append(True)
+
+    event.listen(database, "before_cursor_execute", delete_between_reads)
+    try:
+        stats = storage.get_rating_stats()
+    finally:
+        event.remove(database, "before_cursor_execute", delete_between_reads)
+
+    assert deleted
+    assert stats["count"] == 10  # the snapshot from before the delete
+    assert stats["median"] == 4.5
+    assert stats["min"] == 0.0
+    assert stats["worst_titles"] == ["Movie 0"]
+    assert storage.get_rating_stats()["count"] == 2
+
+
+def test_load_columns(database):
+    storage.bulk_add_movies({"title": f"Movie {number}", "year": 1990 + number, "rating": number / 2}
+                            for number in range(10))
+    columns = storage.load_columns(min_rating=3, title_contains="movie")
+    assert columns.titles == [f"Movie {number}" for number in range(6, 10)]
+    assert columns.years == array("i", [1996, 1997, 1998, 1999])
+    assert columns.ratings == array("d", [3.0, 3.5, 4.0, 4.5])
+    assert storage.load_columns(year_range=(2050, None)) == ([], array("i"), array("d"))
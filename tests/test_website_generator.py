@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import website_generator
+from storage import T4W4movie_storage_sql as storage
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "index_template.html")
+PAGE_SIZE = 5
+
+
+@pytest.fixture
+def movies(database):
+    storage.bulk_add_movies(
+        {"title": f"Movie {number} <&> \"quoted\"", "year": 1980 + number, "rating": 5 + number % 50 / 10,
+         "poster_url": f"https://img.example.com/{number}.jpg" if number % 3 else None}
+        for number in range(23)
+    )
+
+
+def read_pages(folder):
+    """{filename: bytes} of the HTML pages in folder."""
+    return {name: open(os.path.join(folder, name), "rb").read()
+            for name in sorted(os.listdir(folder)) if name.endswith(".html")}
+
+
+def incremental_build(folder, posters=None):
+    return website_generator.update_site(
+        storage.iter_movie_revisions(include_poster_url=posters is not None), storage.movies_in_id_range,
+        TEMPLATE_PATH, str(folder), page_size=PAGE_SIZE, posters=posters
+    )
+
+
+def full_build(folder, posters=None):
+    return website_generator.generate_site(storage.iter_movies(), TEMPLATE_PATH, str(folder),
+                                           page_size=PAGE_SIZE, posters=posters)
+
+
+def test_incremental_build_matches_full_build(movies, tmp_path):
+    incremental = tmp_path / "incremental"
+    incremental.mkdir()
+    assert len(incremental_build(incremental)) == 5
+    assert incremental_build(incremental) == []
+
+    storage.update_movie("Movie 21 <&> \"quoted\"", 9.9, 2001)
+    storage.delete_movie("Movie 3 <&> \"quoted\"")
+    storage.add_movie("Movie 23", 2023, 7.0, None)
+    storage.add_movie("Movie 24", 2024, 7.5, None)
+    rewritten = incremental_build(incremental)
+    assert 0 < len(rewritten)
+
+    full = tmp_path / "full"
+    full.mkdir()
+    full_build(full)
+    assert read_pages(incremental) == read_pages(full)
+
+
+def test_unchanged_pages_are_not_rewritten(movies, tmp_path):
+    incremental_build(tmp_path)
+    storage.update_movie("Movie 22 <&> \"quoted\"", 1.0, 2002)
+    assert incremental_build(tmp_path) == [os.path.join(str(tmp_path), website_generator.page_filename(5))]
+
+
+def test_full_build_invalidates_the_manifest(movies, tmp_path):
+    posters = {f"https://img.example.com/{number}.jpg": f"posters/{number}-256.jpg" for number in range(23)}
+    incremental_build(tmp_path, posters)
+    full_build(tmp_path)  # like build-site --full --no-posters
+    assert not os.path.exists(tmp_path / website_generator.MANIFEST_NAME)
+
+    # The next incremental build brings the local posters back
+    assert len(incremental_build(tmp_path, posters)) == 5
+    expected = tmp_path / "expected"
+    expected.mkdir()
+    full_build(expected, posters)
+    assert read_pages(tmp_path) == read_pages(expected)
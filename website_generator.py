@@ -0,0 +1,214 @@
+"""Render the movie website straight from a stream of movies.
+
+Cards are written to the output file in chunks while the movies are
+read, so memory use does not grow with the catalog. With a page size the
+site is split into index.html, page-2.html, page-3.html, ...
+
+update_site() rebuilds only the pages whose movies changed since the last
+build, using a manifest of page fingerprints stored next to the pages.
+
+Both take an optional posters dict mapping poster URLs to local image
+paths (see poster_cache); cards of movies whose poster is in it show the
+local image instead of hot-linking the remote one.
+"""
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+
+PLACEHOLDER = "__TEMPLATE_MOVIE_GRID__"
+CHUNK_SIZE = 500  # cards per write() call
+MANIFEST_NAME = "site-manifest.json"
+CARD_VERSION = 2  # part of every page fingerprint: bump when render_card() changes
+
+
+def render_card(movie, posters=None):
+    """Return the HTML of one movie card, with the text escaped. The poster
+    is taken from posters (URL -> local path) if it is there and only
+    loaded by the browser when it scrolls into view."""
+    title = html.escape(str(movie.title))
+    poster_url = movie.poster_url or ""
+    if posters is not None:
+        poster_url = posters.get(poster_url, poster_url)
+    poster = html.escape(poster_url)
+    return f"""
+        <div class="movie-card">
+            <h2>{title}</h2>
+            <p>Year: {movie.year}</p>
+            <p>Rating: {movie.rating}</p>
+            <img src="{poster}" alt="{title} poster" class="movie-poster" loading="lazy" decoding="async">
+        </div>
+        """
+
+
+def page_filename(page_number):
+    """index.html for the first page, page-<n>.html for the others."""
+    return "index.html" if page_number == 1 else f"page-{page_number}.html"
+
+
+def render_navigation(page_number, has_next_page):
+    """Return the previous/next links of a page (empty for a single page site)."""
+    if page_number == 1 and not has_next_page:
+        return ""
+    links = []
+    if page_number > 1:
+        links.append(f'<a href="{page_filename(page_number - 1)}">&laquo; Previous</a>')
+    links.append(f"<span>Page {page_number}</span>")
+    if has_next_page:
+        links.append(f'<a href="{page_filename(page_number + 1)}">Next &raquo;</a>')
+    return '<div class="page-navigation">' + " ".join(links) + "</div>\n"
+
+
+def read_template(template_path):
+    """Split the template into the parts before and after the movie grid."""
+    with open(template_path, "r") as f:
+        template = f.read()
+    head, _, tail = template.partition(PLACEHOLDER)
+    return head, tail
+
+
+def write_chunks(f, cards):
+    """Write the cards to f, CHUNK_SIZE cards per write() call."""
+    chunk = []
+    for card in cards:
+        chunk.append(card)
+        if len(chunk) >= CHUNK_SIZE:
+            f.write("".join(chunk))
+            chunk = []
+    f.write("".join(chunk))
+
+
+def write_tail(f, tail, page_number, has_next_page):
+    """Write the end of the template with the page navigation before </body>."""
+    navigation = render_navigation(page_number, has_next_page)
+    f.write(tail.replace("</body>", navigation + "</body>", 1) if navigation else tail)
+
+
+def remove_stale_pages(output_dir, page_count):
+    """Delete page-<n>.html files left over from a build with more pages."""
+    for path in glob.glob(os.path.join(output_dir, "page-*.html")):
+        match = re.fullmatch(r"page-(\d+)\.html", os.path.basename(path))
+        if match and int(match.group(1)) > page_count:
+            os.remove(path)
+
+
+def generate_site(movies, template_path="index_template.html", output_dir=".",
+                  page_size=None, posters=None):
+    """Write the website for an iterable of Movie records and return the
+    list of written files. page_size=None puts all movies on one page.
+    The manifest of update_site() is removed, because its fingerprints no
+    longer describe the pages; the next update_site() rewrites them all."""
+    head, tail = read_template(template_path)
+    try:
+        os.remove(os.path.join(output_dir, MANIFEST_NAME))
+    except FileNotFoundError:
+        pass
+    movies = iter(movies)
+    next_movie = next(movies, None)
+    written = []
+    page_number = 1
+
+    def page_cards():
+        # Stops after page_size cards; next_movie is then the first movie of the next page
+        nonlocal next_movie
+        count = 0
+        while next_movie is not None and (page_size is None or count < page_size):
+            yield render_card(next_movie, posters)
+            count += 1
+            next_movie = next(movies, None)
+
+    while True:
+        path = os.path.join(output_dir, page_filename(page_number))
+        with open(path, "w") as f:
+            f.write(head)
+            write_chunks(f, page_cards())
+            write_tail(f, tail, page_number, has_next_page=next_movie is not None)
+        written.append(path)
+
+        if next_movie is None:
+            break
+        page_number += 1
+
+    remove_stale_pages(output_dir, page_number)
+    return written
+
+
+def page_fingerprint(template_hash, page_number, has_next_page, revisions, posters=None):
+    """Hash of everything a page's HTML depends on. With posters the
+    revisions are (id, revision, poster_url) and the poster's local path
+    counts too, so a page is rewritten once its posters are cached."""
+    digest = hashlib.sha1(f"{template_hash}|{page_number}|{has_next_page}|".encode())
+    for movie_id, revision, *poster_url in revisions:
+        digest.update(f"{movie_id}:{revision},".encode())
+        if posters is not None and poster_url and poster_url[0]:
+            digest.update(f"{posters.get(poster_url[0])},".encode())
+    return digest.hexdigest()
+
+
+def group_pages(revisions, page_size):
+    """Split (id, revision) pairs into pages; yields (page_number, pairs, has_next_page)."""
+    revisions = iter(revisions)
+    page = []
+    page_number = 1
+    for pair in revisions:
+        if page_size is not None and len(page) == page_size:
+            yield page_number, page, True
+            page = []
+            page_number += 1
+        page.append(pair)
+    yield page_number, page, False
+
+
+def load_manifest(output_dir):
+    """Return the manifest of the last build, or an empty one."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"pages": {}}
+
+
+def update_site(revisions, load_movies, template_path="index_template.html",
+                output_dir=".", page_size=None, posters=None):
+    """Rebuild only the pages that changed since the last build.
+    revisions is an iterable of (id, revision) of all movies in display
+    order (see storage.iter_movie_revisions), or of (id, revision,
+    poster_url) when posters is given. load_movies(first_id, last_id)
+    returns the movies of one page. The pages are byte-identical to a full
+    generate_site() build. Returns the list of rewritten files."""
+    head, tail = read_template(template_path)
+    template_hash = hashlib.sha1(f"{CARD_VERSION}|{head}{PLACEHOLDER}{tail}".encode()).hexdigest()
+    old_pages = load_manifest(output_dir)["pages"]
+    new_pages = {}
+    written = []
+    page_count = 0
+
+    for page_number, page, has_next_page in group_pages(revisions, page_size):
+        page_count = page_number
+        filename = page_filename(page_number)
+        path = os.path.join(output_dir, filename)
+        fingerprint = page_fingerprint(template_hash, page_number, has_next_page, page, posters)
+        new_pages[filename] = {
+            "fingerprint": fingerprint,
+            "first_id": page[0][0] if page else None,
+            "last_id": page[-1][0] if page else None,
+            "count": len(page)
+        }
+
+        old_page = old_pages.get(filename)
+        if old_page and old_page["fingerprint"] == fingerprint and os.path.exists(path):
+            continue
+
+        movies = load_movies(page[0][0], page[-1][0]) if page else []
+        with open(path, "w") as f:
+            f.write(head)
+            write_chunks(f, (render_card(movie, posters) for movie in movies))
+            write_tail(f, tail, page_number, has_next_page)
+        written.append(path)
+
+    remove_stale_pages(output_dir, page_count)
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as f:
+        json.dump({"page_size": page_size, "pages": new_pages}, f)
+    return written